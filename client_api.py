@@ -11,6 +11,9 @@ import time
 from datetime import datetime
 import psutil
 from loguru import logger
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from encryption_utils import EncryptionManager
 from client_config import ClientConfig
 import http.server
@@ -30,15 +33,22 @@ class ClientAPI:
         
         self.server_url = server_url
         self.client_id = client_id or self._generate_client_id()
+        
+        # Reuse one keep-alive connection to the server across status updates
+        self.session = requests.Session()
         self.keys_dir = keys_dir or os.path.expanduser('~/Lin-Win-Backup/keys')
         
         # Initialize key management
         os.makedirs(self.keys_dir, exist_ok=True)
         self.private_key_path = os.path.join(self.keys_dir, 'id_rsa')
         self.public_key_path = os.path.join(self.keys_dir, 'id_rsa.pub')
+        self.session_key_path = os.path.join(self.keys_dir, 'session.key')
         
         # Initialize encryption manager
         self.encryption = self._load_or_generate_keys()
+        # AES-GCM key handed out by the server at registration; it is saved so
+        # that the agent process can use a key obtained by the register command
+        self.session_key = self._load_session_key()
         
         # Set up logging
         log_level = self.config.get_log_level()
@@ -165,13 +175,11 @@ class ClientAPI:
                 data['temp_token'] = temp_token
             
             # Send registration request
-            response = requests.post(
-                f"{self.server_url}/api/register_client_key",
-                json=data,
-                headers={'Authorization': f'Bearer {self._get_auth_token()}'}
-            )
+            response = self.session.post(f"{self.server_url}/api/register_client", json=data)
             
             if response.status_code == 200:
+                self.session_key = self._decrypt_session_key(response.json().get('session_key'))
+                self._save_session_key()
                 logger.info("Successfully registered with server")
                 return True
             else:
@@ -182,6 +190,52 @@ class ClientAPI:
             logger.error(f"Error during registration: {str(e)}")
             return False
     
+    def _decrypt_session_key(self, encrypted_key):
+        """Decrypt the session key sent back by the server with the client's private key"""
+        if not encrypted_key:
+            return None
+        with open(self.private_key_path, 'rb') as f:
+            private_key = serialization.load_pem_private_key(f.read(), password=None)
+        return private_key.decrypt(
+            base64.b64decode(encrypted_key),
+            padding.OAEP(
+                mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                algorithm=hashes.SHA256(),
+                label=None
+            )
+        )
+    
+    def _load_session_key(self):
+        """Load the session key saved at registration, if there is one"""
+        try:
+            with open(self.session_key_path, 'rb') as f:
+                return f.read() or None
+        except FileNotFoundError:
+            return None
+    
+    def _save_session_key(self):
+        """Save the session key where only the owner can read it"""
+        if self.session_key is None:
+            return
+        fd = os.open(self.session_key_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self.session_key)
+    
+    def _encrypt_payload(self, payload):
+        """Wrap a request body with the session key, or return it unchanged before registration
+        
+        The body is sent as base64(nonce + ciphertext), with the client id as
+        associated data so the server rejects it when posted for another client.
+        """
+        if self.session_key is None:
+            return payload
+        nonce = os.urandom(12)
+        ciphertext = AESGCM(self.session_key).encrypt(nonce, json.dumps(payload).encode(), self.client_id.encode())
+        return {
+            'encrypted_data': base64.b64encode(nonce + ciphertext).decode(),
+            'encryption': 'aes-gcm'
+        }
+    
     def _get_auth_token(self):
         """Get authentication token for API requests"""
         # First try to get token from environment
@@ -209,14 +263,17 @@ class ClientAPI:
         
         try:
             # Encrypt status data
-            encrypted_data = self.encryption.encrypt_for_server(status_data)
+            if self.session_key is not None:
+                data = self._encrypt_payload(status_data)
+            else:
+                encrypted_data = self.encryption.encrypt_for_server(status_data)
+                data = {
+                    'encrypted_data': encrypted_data
+                }
             
             # Send to server
-            data = {
-                'encrypted_data': encrypted_data
-            }
             
-            response = requests.post(f"{self.server_url}/api/client/{self.client_id}/status", json=data)
+            response = self.session.post(f"{self.server_url}/api/client/{self.client_id}/status", json=data)
             if response.status_code != 200:
                 logger.error(f"Failed to send status update: {response.text}")
                 return False
@@ -239,7 +296,7 @@ class ClientAPI:
         
         try:
             # Get encrypted schedule
-            response = requests.get(f"{self.server_url}/api/client/{this.client_id}/schedule")
+            response = self.session.get(f"{self.server_url}/api/client/{this.client_id}/schedule")
             if response.status_code != 200:
                 logger.error(f"Failed to get schedule: {response.text}")
                 return None
@@ -283,9 +340,9 @@ class ClientAPI:
             }
             
             # Send result to server
-            response = requests.post(
+            response = self.session.post(
                 f"{self.server_url}/api/client/{self.client_id}/backup/result",
-                json=result_data,
+                json=self._encrypt_payload(result_data),
                 headers={'Authorization': f'Bearer {self._get_auth_token()}'}
             )
             
@@ -339,7 +396,7 @@ class ClientAPI:
     def check_schedule(self):
         """Check for scheduled backups"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.server_url}/api/client/{self.client_id}/schedule",
                 headers={'Authorization': f'Bearer {self._get_auth_token()}'}
             )
@@ -507,9 +564,9 @@ class ClientAPI:
             }
             
             # Send status update to server
-            response = requests.post(
+            response = self.session.post(
                 f"{self.server_url}/api/client/{self.client_id}/status",
-                json=status_data,
+                json=self._encrypt_payload(status_data),
                 headers={'Authorization': f'Bearer {self._get_auth_token()}'}
             )
             
@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 import os
+import json
 import base64
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.exceptions import InvalidTag
 
 class EncryptionManager:
     def __init__(self, key_file=None):
@@ -13,12 +16,16 @@ class EncryptionManager:
         self.private_key = None
         self.public_key = None
         self.client_keys = {}  # Store client public keys
+        # AES-GCM keys agreed with clients at registration, kept next to the
+        # private key so that they survive a restart
+        self.session_key_file = os.path.join(os.path.dirname(self.key_file), 'session_keys.json')
         
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(self.key_file), exist_ok=True)
         
         # Load or generate keys
         self._load_or_generate_keys()
+        self.session_keys = self._load_session_keys()
     
     def _load_or_generate_keys(self):
         """Load existing keys or generate new ones"""
@@ -57,6 +64,27 @@ class EncryptionManager:
                     format=serialization.PublicFormat.SubjectPublicKeyInfo
                 ))
     
+    def _load_session_keys(self):
+        """Load the session keys saved by earlier runs"""
+        try:
+            with open(self.session_key_file, 'r') as f:
+                return {client_id: base64.b64decode(key) for client_id, key in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"Error loading session keys: {e}")
+            return {}
+    
+    def _save_session_keys(self):
+        """Write the session keys to a file readable by the owner only, replacing it atomically"""
+        tmp_file = self.session_key_file + '.tmp'
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({client_id: base64.b64encode(key).decode() for client_id, key in self.session_keys.items()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.session_key_file)
+    
     def get_public_key_pem(self):
         """Get the public key in PEM format"""
         return self.public_key.public_bytes(
@@ -116,6 +144,31 @@ class EncryptionManager:
             print(f"Error decrypting data: {e}")
             return None
     
+    def create_session_key(self, client_id):
+        """Create an AES-256-GCM session key for a registered client
+        
+        Returns the key encrypted with the client's public key, for sending
+        back to the client. The key is saved with the others, so clients keep
+        using it across server restarts.
+        """
+        key = AESGCM.generate_key(bit_length=256)
+        encrypted_key = self.encrypt_for_client(client_id, key)
+        self.session_keys[client_id] = key
+        self._save_session_keys()
+        return encrypted_key
+    
+    def decrypt_session_data(self, client_id, encrypted_data):
+        """Decrypt base64(nonce + ciphertext) sent with a client's session key"""
+        key = self.session_keys.get(client_id)
+        if key is None:
+            return None
+        try:
+            data = base64.b64decode(encrypted_data)
+            return AESGCM(key).decrypt(data[:12], data[12:], client_id.encode())
+        except (ValueError, TypeError, InvalidTag) as e:
+            print(f"Error decrypting session data from {client_id}: {e}")
+            return None
+    
     def generate_client_key(self, client_id):
         """Generate a new key pair for a client"""
         # Generate a new key pair
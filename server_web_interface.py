@@ -4,1442 +4,1556 @@ import sys
 import json
 import argparse
 import http.server
-import socketserver
 import threading
 import webbrowser
 import hashlib
+import io
+import mmap
+import gzip
+import hmac
 import secrets
+import time
+import queue
+import atexit
+import functools
+import concurrent.futures
+import email.utils
+from collections import OrderedDict, deque
 from pathlib import Path
 from datetime import datetime, timedelta
 from loguru import logger
 import socket
+import ssl
 import platform
-from urllib.parse import parse_qs, urlparse
+import re
+import ipaddress
 from encryption_utils import EncryptionManager
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import psutil
 
-# HTML template for the login page
-LOGIN_TEMPLATE = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Lin-Win-Backup Server - Login</title>
-    <style>
-        body {
-            font-family: Arial, sans-serif;
-            line-height: 1.6;
-            margin: 0;
-            padding: 20px;
-            background-color: #f5f5f5;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            min-height: 100vh;
-        }
-        .login-container {
-            background-color: white;
-            padding: 30px;
-            border-radius: 5px;
-            box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-            width: 100%;
-            max-width: 400px;
-        }
-        h1 {
-            color: #333;
-            text-align: center;
-            margin-bottom: 30px;
-        }
-        .form-group {
-            margin-bottom: 20px;
-        }
-        label {
-            display: block;
-            margin-bottom: 5px;
-            color: #666;
-        }
-        input[type="text"],
-        input[type="password"] {
-            width: 100%;
-            padding: 8px;
-            border: 1px solid #ddd;
-            border-radius: 4px;
-            box-sizing: border-box;
-        }
-        button {
-            width: 100%;
-            padding: 10px;
-            background-color: #007bff;
-            color: white;
-            border: none;
-            border-radius: 4px;
-            cursor: pointer;
-            font-size: 16px;
-        }
-        button:hover {
-            background-color: #0056b3;
-        }
-        .error-message {
-            color: #dc3545;
-            margin-top: 10px;
-            text-align: center;
-        }
-    </style>
-</head>
-<body>
-    <div class="login-container">
-        <h1>Lin-Win-Backup Server</h1>
-        <form id="login-form" onsubmit="return handleLogin(event)">
-            <div class="form-group">
-                <label for="username">Username</label>
-                <input type="text" id="username" name="username" required>
-            </div>
-            <div class="form-group">
-                <label for="password">Password</label>
-                <input type="password" id="password" name="password" required>
-            </div>
-            <button type="submit">Login</button>
-            <div id="error-message" class="error-message"></div>
-        </form>
-    </div>
-    <script>
-        async function handleLogin(event) {
-            event.preventDefault();
-            const username = document.getElementById('username').value;
-            const password = document.getElementById('password').value;
-            
-            try {
-                const response = await fetch('/login', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({ username, password }),
-                });
-                
-                const data = await response.json();
-                
-                if (data.success) {
-                    window.location.href = '/dashboard';
-                } else {
-                    document.getElementById('error-message').textContent = data.error || 'Invalid credentials';
-                }
-            } catch (error) {
-                document.getElementById('error-message').textContent = 'An error occurred. Please try again.';
-            }
-            
-            return false;
-        }
-    </script>
-</body>
-</html>
-"""
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-# HTML template for the dashboard page
-DASHBOARD_TEMPLATE = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Lin-Win-Backup Server Dashboard</title>
-    <style>
-        body {
-            font-family: Arial, sans-serif;
-            line-height: 1.6;
-            margin: 0;
-            padding: 20px;
-            background-color: #f5f5f5;
-        }
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-            background-color: white;
-            padding: 20px;
-            border-radius: 5px;
-            box-shadow: 0 2px 5px rgba(0,0,0,0.1);
-        }
-        .header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 20px;
-            padding-bottom: 20px;
-            border-bottom: 1px solid #ddd;
-        }
-        .client-selector {
-            margin-bottom: 20px;
-        }
-        select {
-            padding: 8px;
-            font-size: 16px;
-            border: 1px solid #ddd;
-            border-radius: 4px;
-            width: 100%;
-            max-width: 300px;
-        }
-        .status-card {
-            background-color: #f9f9f9;
-            border: 1px solid #ddd;
-            border-radius: 5px;
-            padding: 15px;
-            margin-bottom: 20px;
-        }
-        .status-header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 10px;
-        }
-        .status-badge {
-            padding: 5px 10px;
-            border-radius: 3px;
-            font-weight: bold;
-        }
-        .status-running {
-            background-color: #d4edda;
-            color: #155724;
-        }
-        .status-stopped {
-            background-color: #f8d7da;
-            color: #721c24;
-        }
-        .status-completed {
-            background-color: #d4edda;
-            color: #155724;
-        }
-        .status-failed {
-            background-color: #f8d7da;
-            color: #721c24;
-        }
-        .status-pending {
-            background-color: #fff3cd;
-            color: #856404;
-        }
-        .action-buttons {
-            margin-top: 20px;
-        }
-        .btn {
-            padding: 8px 15px;
-            border: none;
-            border-radius: 4px;
-            cursor: pointer;
-            font-size: 14px;
-            margin-right: 10px;
-        }
-        .btn-primary {
-            background-color: #007bff;
-            color: white;
-        }
-        .btn-danger {
-            background-color: #dc3545;
-            color: white;
-        }
-        .btn-success {
-            background-color: #28a745;
-            color: white;
-        }
-        .schedule-form {
-            margin-top: 20px;
-            padding: 20px;
-            background-color: #f8f9fa;
-            border-radius: 5px;
-        }
-        .form-group {
-            margin-bottom: 15px;
-        }
-        label {
-            display: block;
-            margin-bottom: 5px;
-            color: #666;
-        }
-        input[type="text"],
-        input[type="datetime-local"],
-        select {
-            width: 100%;
-            padding: 8px;
-            border: 1px solid #ddd;
-            border-radius: 4px;
-            box-sizing: border-box;
-        }
-        .backup-history {
-            margin-top: 20px;
-        }
-        table {
-            width: 100%;
-            border-collapse: collapse;
-        }
-        th, td {
-            padding: 10px;
-            text-align: left;
-            border-bottom: 1px solid #ddd;
-        }
-        th {
-            background-color: #f2f2f2;
-        }
-        .logout-btn {
-            background-color: #6c757d;
-            color: white;
-            padding: 8px 15px;
-            border: none;
-            border-radius: 4px;
-            cursor: pointer;
-        }
-        .add-client-form {
-            margin-top: 20px;
-            padding: 20px;
-            background-color: #f8f9fa;
-            border-radius: 5px;
-            display: none;
-        }
-        .add-client-btn {
-            background-color: #28a745;
-            color: white;
-            padding: 8px 15px;
-            border: none;
-            border-radius: 4px;
-            cursor: pointer;
-            margin-bottom: 20px;
-        }
-        .form-row {
-            display: flex;
-            gap: 10px;
-            margin-bottom: 15px;
-        }
-        .form-group {
-            flex: 1;
-        }
-        .backup-control {
-            margin-top: 20px;
-            padding: 20px;
-            background-color: #f8f9fa;
-            border-radius: 5px;
-        }
-        
-        .backup-control h3 {
-            margin-top: 0;
-            margin-bottom: 15px;
-        }
-        
-        .backup-buttons {
-            display: flex;
-            gap: 10px;
-            margin-bottom: 15px;
-        }
-        
-        .backup-button {
-            padding: 10px 20px;
-            border: none;
-            border-radius: 5px;
-            cursor: pointer;
-            font-weight: bold;
-            transition: background-color 0.2s;
-        }
-        
-        .backup-button.full {
-            background-color: #007bff;
-            color: white;
-        }
-        
-        .backup-button.incremental {
-            background-color: #28a745;
-            color: white;
-        }
-        
-        .backup-button.directory {
-            background-color: #17a2b8;
-            color: white;
-        }
-        
-        .backup-button:hover {
-            opacity: 0.9;
-        }
-        
-        .directory-input {
-            display: none;
-            margin-top: 10px;
-        }
-        
-        .directory-input input {
-            width: 100%;
-            padding: 8px;
-            border: 1px solid #ddd;
-            border-radius: 4px;
-            margin-bottom: 10px;
-        }
-        
-        .directory-input button {
-            padding: 8px 15px;
-            background-color: #28a745;
-            color: white;
-            border: none;
-            border-radius: 4px;
-            cursor: pointer;
-        }
-        
-        .error-message {
-            color: #dc3545;
-            margin-top: 10px;
-            display: none;
-        }
-        
-        .backup-info {
-            margin-top: 20px;
-        }
-        
-        .backup-info h3 {
-            margin-bottom: 10px;
-            color: #333;
-        }
-        
-        .backup-info p {
-            margin: 5px 0;
-            color: #666;
-        }
-        
-        .backup-info .status {
-            font-weight: bold;
-        }
-        
-        .backup-info .status.in-progress {
-            color: #007bff;
-        }
-        
-        .backup-info .status.completed {
-            color: #28a745;
-        }
-        
-        .backup-info .status.failed {
-            color: #dc3545;
-        }
-        
-        .backup-history {
-            margin-top: 20px;
-        }
-        
-        .backup-history table {
-            width: 100%;
-            border-collapse: collapse;
-            margin-top: 10px;
-        }
-        
-        .backup-history th, .backup-history td {
-            padding: 8px;
-            text-align: left;
-            border-bottom: 1px solid #ddd;
-        }
-        
-        .backup-history th {
-            background-color: #f8f9fa;
-            font-weight: bold;
-        }
-        
-        .backup-history tr:hover {
-            background-color: #f5f5f5;
-        }
-        
-        .backup-schedule {
-            margin-top: 20px;
-        }
-        
-        .backup-schedule .schedule-item {
-            margin-bottom: 10px;
-            padding: 10px;
-            background-color: #f8f9fa;
-            border-radius: 5px;
-        }
-        
-        .backup-schedule .schedule-item h4 {
-            margin: 0 0 5px 0;
-            color: #333;
-        }
-        
-        .backup-schedule .schedule-item p {
-            margin: 5px 0;
-            color: #666;
-        }
-        
-        .no-data {
-            color: #999;
-            font-style: italic;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>Lin-Win-Backup Server Dashboard</h1>
-            <button class="logout-btn" onclick="handleLogout()">Logout</button>
-        </div>
-        
-        <button class="add-client-btn" onclick="showAddClientForm()">Add New Client</button>
-        
-        <div id="add-client-form" class="add-client-form">
-            <h3>Add New Client</h3>
-            <form onsubmit="return handleAddClient(event)">
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="client-ip">Client IP Address:</label>
-                        <input type="text" id="client-ip" required pattern="^(?:[0-9]{1,3}\.){3}[0-9]{1,3}$" placeholder="192.168.1.100">
-                    </div>
-                    <div class="form-group">
-                        <label for="client-name">Friendly Name (optional):</label>
-                        <input type="text" id="client-name" placeholder="e.g., Office PC">
-                    </div>
-                </div>
-                <button type="submit" class="btn btn-success">Add Client</button>
-                <button type="button" class="btn btn-danger" onclick="hideAddClientForm()">Cancel</button>
-            </form>
-        </div>
-        
-        <div class="client-selector">
-            <label for="client-select">Select Client:</label>
-            <select id="client-select" onchange="loadClientData()">
-                <option value="">Select a client...</option>
-            </select>
-        </div>
-        
-        <div id="client-data" style="display: none;">
-            <div class="status-card">
-                <h2>Client Status</h2>
-                <p><strong>Hostname:</strong> <span id="hostname">-</span></p>
-                <p><strong>System:</strong> <span id="system">-</span></p>
-                <p><strong>Status:</strong> <span id="status">-</span></p>
-                <p><strong>Last Seen:</strong> <span id="last-seen">-</span></p>
-            </div>
-            
-            <div class="backup-control">
-                <h3>Backup Control</h3>
-                <div class="backup-buttons">
-                    <button class="backup-button full" onclick="startBackup('full')">Start Full Backup</button>
-                    <button class="backup-button incremental" onclick="startBackup('incremental')">Start Incremental Backup</button>
-                    <button class="backup-button directory" onclick="showDirectoryInput()">Start Directory Backup</button>
-                </div>
-                
-                <div id="directory-input" class="directory-input">
-                    <input type="text" id="source-dir" placeholder="Enter directory path">
-                    <button onclick="startDirectoryBackup()">Start Backup</button>
-                </div>
-                
-                <div id="error-message" class="error-message"></div>
-            </div>
-            
-            <div class="status-card">
-                <h2>Current Backup</h2>
-                <div id="current-backup" class="backup-info">
-                    <p class="no-data">No backup in progress</p>
-                </div>
-            </div>
-            
-            <div class="status-card">
-                <h2>Backup Schedule</h2>
-                <div id="backup-schedule" class="backup-schedule">
-                    <p class="no-data">No scheduled backups</p>
-                </div>
-            </div>
-            
-            <div class="status-card">
-                <h2>Backup History</h2>
-                <div id="backup-history" class="backup-history">
-                    <p class="no-data">No backup history available</p>
-                </div>
-            </div>
-        </div>
-    </div>
-    
-    <script>
-        let currentClient = null;
-        
-        function formatBytes(bytes) {
-            if (bytes === 0) return '0 Bytes';
-            const k = 1024;
-            const sizes = ['Bytes', 'KB', 'MB', 'GB', 'TB'];
-            const i = Math.floor(Math.log(bytes) / Math.log(k));
-            return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
-        }
-        
-        function formatDate(dateString) {
-            if (!dateString) return '-';
-            const date = new Date(dateString);
-            return date.toLocaleString();
-        }
-        
-        function updateStatusBadge(element, status) {
-            element.textContent = status;
-            element.className = 'status-badge status-' + status.toLowerCase();
-        }
-        
-        async function loadClients() {
-            try {
-                const response = await fetch('/api/clients');
-                const clients = await response.json();
-                
-                const select = document.getElementById('client-select');
-                select.innerHTML = '<option value="">Select a client...</option>';
-                
-                clients.forEach(client => {
-                    const option = document.createElement('option');
-                    option.value = client.id;
-                    option.textContent = client.hostname;
-                    select.appendChild(option);
-                });
-            } catch (error) {
-                console.error('Error loading clients:', error);
-            }
-        }
-        
-        async function loadClientData() {
-            const clientId = document.getElementById('client-select').value;
-            if (!clientId) {
-                document.getElementById('client-data').style.display = 'none';
-                return;
-            }
-            
-            document.getElementById('client-data').style.display = 'block';
-            
-            try {
-                const response = await fetch(`/api/client/${clientId}`);
-                const data = await response.json();
-                
-                document.getElementById('hostname').textContent = data.hostname;
-                document.getElementById('system').textContent = data.system;
-                updateStatusBadge(document.getElementById('status'), data.status || 'Unknown');
-                document.getElementById('last-seen').textContent = formatDate(data.last_seen);
-                
-                updateCurrentBackup(data.current_backup);
-                updateBackupSchedule(data.next_scheduled);
-                updateBackupHistory(data.backup_history);
-                
-                currentClient = clientId;
-            } catch (error) {
-                console.error('Error loading client data:', error);
-            }
-        }
-        
-        function updateCurrentBackup(currentBackup) {
-            const element = document.getElementById('current-backup');
-            
-            if (!currentBackup) {
-                element.innerHTML = '<p class="no-data">No backup in progress</p>';
-                return;
-            }
-            
-            let statusClass = '';
-            if (currentBackup.status === 'in_progress') {
-                statusClass = 'in-progress';
-            } else if (currentBackup.status === 'completed') {
-                statusClass = 'completed';
-            } else if (currentBackup.status === 'failed') {
-                statusClass = 'failed';
-            }
-            
-            element.innerHTML = `
-                <p><strong>Type:</strong> ${currentBackup.type || 'Unknown'}</p>
-                <p><strong>Status:</strong> <span class="status ${statusClass}">${currentBackup.status || 'Unknown'}</span></p>
-                <p><strong>Progress:</strong> ${currentBackup.progress || 0}%</p>
-                <p><strong>Start Time:</strong> ${formatDate(currentBackup.start_time)}</p>
-                ${currentBackup.error ? `<p><strong>Error:</strong> ${currentBackup.error}</p>` : ''}
-            `;
-        }
-        
-        function updateBackupSchedule(schedule) {
-            const element = document.getElementById('backup-schedule');
-            
-            if (!schedule || !schedule.next_scheduled) {
-                element.innerHTML = '<p class="no-data">No scheduled backups</p>';
-                return;
-            }
-            
-            element.innerHTML = `
-                <div class="schedule-item">
-                    <h4>Next Scheduled Backup</h4>
-                    <p><strong>Type:</strong> ${schedule.type || 'Unknown'}</p>
-                    <p><strong>Time:</strong> ${formatDate(schedule.next_scheduled)}</p>
-                    ${schedule.source_dir ? `<p><strong>Source Directory:</strong> ${schedule.source_dir}</p>` : ''}
-                </div>
-            `;
-        }
-        
-        function updateBackupHistory(history) {
-            const element = document.getElementById('backup-history');
-            
-            if (!history || history.length === 0) {
-                element.innerHTML = '<p class="no-data">No backup history available</p>';
-                return;
-            }
-            
-            let tableHtml = `
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Type</th>
-                            <th>Status</th>
-                            <th>Start Time</th>
-                            <th>End Time</th>
-                            <th>Size</th>
-                            <th>Files</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-            `;
-            
-            history.forEach(backup => {
-                let statusClass = '';
-                if (backup.status === 'completed') {
-                    statusClass = 'completed';
-                } else if (backup.status === 'failed') {
-                    statusClass = 'failed';
-                }
-                
-                tableHtml += `
-                    <tr>
-                        <td>${backup.type || 'Unknown'}</td>
-                        <td><span class="status ${statusClass}">${backup.status || 'Unknown'}</span></td>
-                        <td>${formatDate(backup.start_time)}</td>
-                        <td>${formatDate(backup.end_time)}</td>
-                        <td>${formatBytes(backup.size || 0)}</td>
-                        <td>${backup.files || 0}</td>
-                    </tr>
-                `;
-            });
-            
-            tableHtml += `
-                    </tbody>
-                </table>
-            `;
-            
-            element.innerHTML = tableHtml;
-        }
-        
-        function showScheduleForm() {
-            document.getElementById('schedule-form').style.display = 'block';
-        }
-        
-        function hideScheduleForm() {
-            document.getElementById('schedule-form').style.display = 'none';
-        }
-        
-        async function handleScheduleSubmit(event) {
-            event.preventDefault();
-            
-            const scheduleData = {
-                type: document.getElementById('schedule-type').value,
-                time: document.getElementById('schedule-time').value,
-                source: document.getElementById('schedule-source').value
-            };
-            
-            try {
-                const response = await fetch(`/api/client/${currentClient}/schedule`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify(scheduleData),
-                });
-                
-                if (response.ok) {
-                    hideScheduleForm();
-                    loadClientData();
-                } else {
-                    const data = await response.json();
-                    alert(data.error || 'Failed to add schedule');
-                }
-            } catch (error) {
-                console.error('Error adding schedule:', error);
-                alert('An error occurred while adding the schedule');
-            }
-            
-            return false;
-        }
-        
-        async function handleLogout() {
-            try {
-                const response = await fetch('/logout', {
-                    method: 'POST',
-                });
-                
-                if (response.ok) {
-                    window.location.href = '/';
-                }
-            } catch (error) {
-                console.error('Error logging out:', error);
-            }
-        }
-        
-        function showAddClientForm() {
-            document.getElementById('add-client-form').style.display = 'block';
-        }
-        
-        function hideAddClientForm() {
-            document.getElementById('add-client-form').style.display = 'none';
-            document.getElementById('client-ip').value = '';
-            document.getElementById('client-name').value = '';
-        }
-        
-        async function handleAddClient(event) {
-            event.preventDefault();
-            
-            const ip = document.getElementById('client-ip').value;
-            const friendlyName = document.getElementById('client-name').value;
-            
-            try {
-                const response = await fetch('/api/add_client', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({
-                        ip: ip,
-                        friendly_name: friendlyName
-                    }),
-                });
-                
-                const data = await response.json();
-                
-                if (response.ok) {
-                    hideAddClientForm();
-                    loadClients(); // Refresh the client list
-                    alert('Client added successfully!');
-                } else {
-                    alert(data.error || 'Failed to add client');
-                }
-            } catch (error) {
-                console.error('Error adding client:', error);
-                alert('An error occurred while adding the client');
-            }
-            
-            return false;
-        }
-        
-        function showDirectoryInput() {
-            document.getElementById('directory-input').style.display = 'block';
-        }
-        
-        function startBackup(type) {
-            const clientId = document.getElementById('client-select').value;
-            if (!clientId) {
-                showError('Please select a client first');
-                return;
-            }
-            
-            fetch(`/api/client/${clientId}/backup/start`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({ type: type })
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.error) {
-                    showError(data.error);
-                } else {
-                    hideError();
-                    loadClientData();
-                }
-            })
-            .catch(error => {
-                showError('Failed to start backup: ' + error);
-            });
-        }
-        
-        function startDirectoryBackup() {
-            const clientId = document.getElementById('client-select').value;
-            const sourceDir = document.getElementById('source-dir').value;
-            
-            if (!clientId) {
-                showError('Please select a client first');
-                return;
-            }
-            
-            if (!sourceDir) {
-                showError('Please enter a directory path');
-                return;
-            }
-            
-            fetch(`/api/client/${clientId}/backup/start`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({
-                    type: 'directory',
-                    source_dir: sourceDir
-                })
-            })
-            .then(response => response.json())
-            .then(data => {
-                if (data.error) {
-                    showError(data.error);
-                } else {
-                    hideError();
-                    document.getElementById('directory-input').style.display = 'none';
-                    document.getElementById('source-dir').value = '';
-                    loadClientData();
-                }
-            })
-            .catch(error => {
-                showError('Failed to start backup: ' + error);
-            });
-        }
-        
-        function showError(message) {
-            const errorElement = document.getElementById('error-message');
-            errorElement.textContent = message;
-            errorElement.style.display = 'block';
-        }
-        
-        function hideError() {
-            document.getElementById('error-message').style.display = 'none';
-        }
-        
-        // Initial load
-        loadClients();
-    </script>
-</body>
-</html>
-"""
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHash, VerificationError
+except ImportError:
+    PasswordHasher = None
+
+# JSON helpers working on bytes; orjson is used when it is installed.
+# Other iterables held in the client records (the backup history deques)
+# are serialized as lists.
+if orjson is not None:
+    _loads = orjson.loads
+    
+    def _dumps(obj, indent=False):
+        return orjson.dumps(obj, default=list, option=orjson.OPT_INDENT_2 if indent else 0)
+else:
+    _loads = json.loads
+    
+    def _dumps(obj, indent=False):
+        return json.dumps(obj, default=list, indent=2 if indent else None).encode()
+
+# Number of backup results kept per client
+BACKUP_HISTORY_LENGTH = 10
+
+# Server data locations, resolved once at import
+CLIENTS_DIR = os.path.expanduser('~/Lin-Win-Backup/clients')
+CLIENTS_FILE = os.path.join(CLIENTS_DIR, 'clients.json')
+USERS_FILE = os.path.join(CLIENTS_DIR, 'users.json')
+CLIENT_KEYS_DIR = os.path.expanduser('~/Lin-Win-Backup/keys/clients')
+SERVER_KEYS_DIR = os.path.expanduser('~/Lin-Win-Backup/keys/server')
+LOG_DIR = os.path.expanduser('~/Lin-Win-Backup/logs')
+
+# Static pages served by the handler, loaded from disk on first use
+STATIC_DIR = Path(__file__).resolve().parent / 'static'
+
+def strip_indentation(data):
+    """Drop leading and trailing whitespace from every line, and empty lines
+    
+    Line breaks are kept, so JavaScript statement boundaries and // comments
+    are unaffected; the pages contain no <pre> or <textarea> content.
+    """
+    return b'\n'.join(line.strip() for line in bytes(data).splitlines() if line.strip())
+
+class StaticPage:
+    """Static file mapped into memory the first time it is requested
+    
+    Pages listing assets have every /static/<asset filename> reference
+    rewritten to the asset's content-hashed URL; those are held in memory as
+    bytes instead, and have no file to send.
+    """
+    
+    def __init__(self, filename, content_type='text/html; charset=utf-8', cache_control='no-cache', assets=()):
+        self.path = STATIC_DIR / filename
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.assets = assets
+        self.file = None
+        self._data = None
+        self._compressed = {}  # Content-Encoding -> compressed contents
+        self._lock = threading.Lock()
+    
+    @property
+    def data(self):
+        """Read-only memory map of the file contents"""
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    if self.assets:
+                        data = self.path.read_bytes()
+                        for asset in self.assets:
+                            data = data.replace(f'/static/{asset.path.name}"'.encode(), f'{asset.url}"'.encode())
+                        self._data = data
+                    else:
+                        f = open(self.path, 'rb')
+                        self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                        self.file = f
+        return self._data
+    
+    def compressed(self, encoding):
+        """Copy of the file contents compressed as 'br' or 'gzip', built on first use
+        
+        HTML, CSS and JavaScript are stripped of indentation first; the
+        uncompressed variant is sent unchanged straight from the file.
+        """
+        compressed = self._compressed.get(encoding)
+        if compressed is None:
+            data = self.data
+            with self._lock:
+                compressed = self._compressed.get(encoding)
+                if compressed is None:
+                    if self.content_type.startswith(('text/html', 'text/css', 'text/javascript')):
+                        data = strip_indentation(data)
+                    if encoding == 'br':
+                        compressed = brotli.compress(data, quality=11)
+                    else:
+                        compressed = gzip.compress(data, 9, mtime=0)
+                    self._compressed[encoding] = compressed
+        return compressed
+
+@functools.lru_cache(maxsize=64)
+def accepted_encodings(accept_encoding):
+    """Content codings allowed by an Accept-Encoding header value
+    
+    Codings listed with q=0 are refused, and "*" allows every coding not
+    listed. Browsers send the same few values, so the results are cached.
+    """
+    accepted = set()
+    refused = set()
+    for item in accept_encoding.split(','):
+        coding, *params = item.split(';')
+        coding = coding.strip().lower()
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            (accepted if quality > 0 else refused).add(coding)
+    if '*' in accepted:
+        accepted.update(coding for coding in ('br', 'gzip') if coding not in refused)
+    return frozenset(accepted - refused)
+
+class StaticAsset(StaticPage):
+    """Stylesheet or script served under a name carrying a hash of its contents
+    
+    The URL changes whenever the file does, so browsers may keep it for good
+    and a dashboard reload only transfers the HTML. Like the file contents,
+    the hash is computed on first use.
+    """
+    
+    def __init__(self, filename, content_type):
+        super().__init__(filename, content_type, cache_control='public, max-age=31536000, immutable')
+        self._url = None
+    
+    @property
+    def url(self):
+        """Path the asset is served under"""
+        if self._url is None:
+            digest = hashlib.sha256(self.data).hexdigest()[:10]
+            self._url = f'/static/{self.path.stem}.{digest}{self.path.suffix}'
+        return self._url
+
+DASHBOARD_CSS = StaticAsset('dashboard.css', 'text/css; charset=utf-8')
+DASHBOARD_JS = StaticAsset('dashboard.js', 'text/javascript; charset=utf-8')
+STATIC_ASSETS = (DASHBOARD_CSS, DASHBOARD_JS)
+
+# The login page is public and may be cached; the dashboard is revalidated so
+# that a browser does not show it from cache after logging out
+LOGIN_PAGE = StaticPage('login.html', cache_control='public, max-age=3600')
+DASHBOARD_PAGE = StaticPage('dashboard.html', cache_control='private, no-cache',
+                            assets=(DASHBOARD_CSS, DASHBOARD_JS))
+
+class TTLCache:
+    """Small thread-safe LRU mapping whose entries expire after a fixed time"""
+    
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        """Store value for key, evicting the least recently used entries"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+# Password hashes are stored in Argon2id's PHC format ("$argon2id$...") when
+# argon2-cffi is installed, using the OWASP recommended parameters, and as
+# "pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>" otherwise
+PASSWORD_HASH_SCHEME = 'pbkdf2_sha256'
+PASSWORD_HASH_ITERATIONS = 100_000
+_ARGON2 = PasswordHasher(time_cost=3, memory_cost=46 * 1024, parallelism=1) if PasswordHasher is not None else None
+
+def hash_password(password):
+    """Hash a password for storage in the users file"""
+    if _ARGON2 is not None:
+        return _ARGON2.hash(password)
+    salt = secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, PASSWORD_HASH_ITERATIONS)
+    return f"{PASSWORD_HASH_SCHEME}${PASSWORD_HASH_ITERATIONS}${salt.hex()}${digest.hex()}"
+
+# Verified against when a login names an unknown user or a legacy hash does
+# not match, so that the response time does not reveal whether the username
+# exists or what kind of hash it has
+_DUMMY_PASSWORD_HASH = hash_password(secrets.token_urlsafe(32))
+
+def verify_password(password, hashed_password):
+    """Check a password against a stored hash in constant time
+    
+    PBKDF2 hashes and the plain SHA-256 hex digests written by older versions
+    are still accepted; a failed check against a SHA-256 digest also runs a
+    full verification of a dummy hash, so it takes as long as any other.
+    """
+    if hashed_password.startswith('$argon2'):
+        if _ARGON2 is None:
+            logger.error("Password hash needs argon2-cffi, which is not installed")
+            return False
+        try:
+            return _ARGON2.verify(hashed_password, password)
+        except (VerificationError, InvalidHash):
+            return False
+    if not hashed_password.startswith(PASSWORD_HASH_SCHEME + '$'):
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        if hmac.compare_digest(legacy, hashed_password):
+            return True
+        # A wrong password costs as much as for a current hash
+        verify_password(password, _DUMMY_PASSWORD_HASH)
+        return False
+    try:
+        _, iterations, salt, expected = hashed_password.split('$')
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode(), bytes.fromhex(salt), int(iterations))
+    except ValueError:
+        return False
+    return hmac.compare_digest(digest.hex(), expected)
+
+def password_needs_rehash(hashed_password):
+    """Whether a stored hash predates the current scheme or its parameters"""
+    if _ARGON2 is not None:
+        if not hashed_password.startswith('$argon2'):
+            return True
+        try:
+            return _ARGON2.check_needs_rehash(hashed_password)
+        except InvalidHash:
+            return True
+    return not hashed_password.startswith(f"{PASSWORD_HASH_SCHEME}${PASSWORD_HASH_ITERATIONS}$")
+
+def token_digest(token):
+    """Key under which a session token is indexed
+    
+    Tokens are looked up by their SHA-256 digest, so the comparison made by
+    the dictionary lookup never runs over the secret token itself and its
+    timing reveals nothing about how much of a guessed token was right.
+    """
+    return hashlib.sha256(token.encode()).digest()
+
+# Successful password verifications are remembered for a short window so that
+# repeated logins by the same operator do not pay the hashing cost again.
+# Keys hold a salted digest of the password rather than the password itself.
+_LOGIN_CACHE = TTLCache(maxsize=128, ttl=1.0)
+_LOGIN_CACHE_SALT = secrets.token_bytes(16)
+
+# Last formatted timestamp as [time.time() value, ISO string]; replaced as a
+# whole so readers on other threads always see a matching pair
+_timestamp_cache = [0.0, '']
+
+def now_iso():
+    """Current local time in ISO format, refreshed at most once per second
+    
+    Used for last_seen fields, where second granularity is enough.
+    """
+    global _timestamp_cache
+    cached = _timestamp_cache
+    now = time.time()
+    if now - cached[0] >= 1.0:
+        cached = _timestamp_cache = [now, datetime.fromtimestamp(now).isoformat()]
+    return cached[1]
+
+# Last Date header value as [whole second, formatted bytes], replaced as a
+# whole like _timestamp_cache
+_http_date_cache = [0, b'']
+
+def http_date():
+    """Current time formatted for the Date header, refreshed once per second
+    
+    Filled into the prebuilt responses, which bypass send_response().
+    """
+    global _http_date_cache
+    cached = _http_date_cache
+    now = int(time.time())
+    if now != cached[0]:
+        cached = _http_date_cache = [now, email.utils.formatdate(now, usegmt=True).encode()]
+    return cached[1]
+
+# Reverse DNS lookups for added clients run on a small pool so that a slow
+# resolver cannot hold a request thread for longer than HOSTNAME_LOOKUP_TIMEOUT;
+# results, including failures, are cached per IP address
+HOSTNAME_LOOKUP_TIMEOUT = 0.5
+_DNS_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix='dns')
+_HOSTNAME_CACHE = TTLCache(maxsize=256, ttl=300.0)
+
+def resolve_hostname(ip):
+    """Reverse resolve an IP address, falling back to the address itself"""
+    try:
+        hostname = socket.gethostbyaddr(ip)[0]
+    except OSError:
+        hostname = ip
+    _HOSTNAME_CACHE.set(ip, hostname)
+    return hostname
+
+# Requests to client agents share pooled keep-alive connections. Only failed
+# connection attempts are retried, since a POST may already have been acted on
+CLIENT_REQUEST_TIMEOUT = (3, 10)  # Connect and read timeouts in seconds
+_CLIENT_SESSION = requests.Session()
+_CLIENT_ADAPTER = HTTPAdapter(pool_connections=64, pool_maxsize=16,
+                              max_retries=Retry(total=2, read=0, backoff_factor=0.1))
+_CLIENT_SESSION.mount('http://', _CLIENT_ADAPTER)
+_CLIENT_SESSION.mount('https://', _CLIENT_ADAPTER)
+
+# Backup start requests are sent to the agents from this pool, so the
+# dashboard's request is answered without waiting on the client machine
+_BACKUP_START_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=16, thread_name_prefix='backup-start')
+
+# Seconds between keepalive comments on an idle /api/events stream
+EVENT_KEEPALIVE_INTERVAL = 10
+
+# Recently decrypted client payloads, keyed by (client id, scheme, ciphertext
+# digest), so that a retried request is not decrypted and parsed again
+_DECRYPTED_PAYLOAD_CACHE = TTLCache(maxsize=1024, ttl=5.0)
+
+# Extracts the session token from a Cookie header
+_AUTH_COOKIE_RE = re.compile(r'(?:^|;)\s*auth_token=([^;\s]+)')
+
+# Headers sent with every response: by end_headers() for responses built with
+# send_header(), and spliced into the preformatted responses below
+COMMON_HEADER_ITEMS = (
+    ('Access-Control-Allow-Origin', '*'),
+    ('X-Content-Type-Options', 'nosniff'),
+)
+COMMON_HEADERS = b''.join(f'{name}: {value}\r\n'.encode('latin-1') for name, value in COMMON_HEADER_ITEMS)
+
+# Seconds a login session stays valid
+SESSION_LIFETIME = 12 * 3600
+
+# Complete response to a successful login; only the protocol version, the date
+# and the session token change between requests
+_LOGIN_OK_TEMPLATE = (
+    b'%b 200 OK\r\n'
+    b'Date: %b\r\n'
+    b'Content-Type: application/json\r\n'
+    b'Set-Cookie: auth_token=%b; Path=/; Max-Age=' + str(SESSION_LIFETIME).encode() + b'; HttpOnly; SameSite=Strict\r\n'
+    b'Content-Length: 16\r\n'
+    + COMMON_HEADERS +
+    b'\r\n'
+    b'{"success":true}'
+)
+
+# Complete response to a logout, clearing the session cookie; filled with the
+# protocol version and the date
+_LOGOUT_OK_TEMPLATE = (
+    b'%b 200 OK\r\n'
+    b'Date: %b\r\n'
+    b'Content-Type: application/json\r\n'
+    b'Set-Cookie: auth_token=; Path=/; HttpOnly; Max-Age=0\r\n'
+    b'Content-Length: 16\r\n'
+    + COMMON_HEADERS +
+    b'\r\n'
+    b'{"success":true}'
+)
+
+# Complete JSON response, written with a single call instead of going through
+# send_response/send_header; filled with the protocol version, status code,
+# reason phrase, date, body length and body
+_JSON_RESPONSE_TEMPLATE = (
+    b'%b %d %b\r\n'
+    b'Date: %b\r\n'
+    b'Content-Type: application/json\r\n'
+    b'Content-Length: %d\r\n'
+    + COMMON_HEADERS +
+    b'\r\n'
+    b'%b'
+)
+
+# A client record with its entity tag, and the bodiless reply sent when the
+# dashboard already holds that version; filled with the protocol version, the
+# date, the tag and, for the full response, the body length and body
+_CLIENT_RESPONSE_TEMPLATE = (
+    b'%b 200 OK\r\n'
+    b'Date: %b\r\n'
+    b'Content-Type: application/json\r\n'
+    b'Cache-Control: private, no-cache\r\n'
+    b'ETag: %b\r\n'
+    b'Content-Length: %d\r\n'
+    + COMMON_HEADERS +
+    b'\r\n'
+    b'%b'
+)
+_NOT_MODIFIED_TEMPLATE = (
+    b'%b 304 Not Modified\r\n'
+    b'Date: %b\r\n'
+    b'Cache-Control: private, no-cache\r\n'
+    b'ETag: %b\r\n'
+    + COMMON_HEADERS +
+    b'\r\n'
+)
+
+# Pre-encoded bodies for the error responses sent on hot paths
+_ERROR_BODIES = {
+    message: _dumps({'error': message})
+    for message in (
+        'Unauthorized',
+        'Not found',
+        'Client not found',
+        'Empty request body',
+        'Invalid JSON in request body',
+        'Invalid encrypted data',
+        'Request body must be a JSON object',
+        'Internal server error',
+    )
+}
+_LOGIN_FAILED_BODY = _dumps({'success': False, 'error': 'Invalid credentials'})
+
+# Largest request body accepted by do_POST; every API payload is small JSON
+MAX_BODY_SIZE = 1 << 20
+
+# Request routing tables. Fixed paths map to (handler method, requires
+# authentication) and are looked up directly; paths carrying a client id are
+# matched in order against (pattern, handler method, requires authentication),
+# and the named groups are passed to the handler as keyword arguments.
+# The query string is stripped before either lookup.
+_GET_ROUTES = {
+    '/': ('_serve_login_page', False),
+    '/dashboard': ('_serve_dashboard_page', True),
+    '/api/public_key': ('_handle_public_key', False),
+    '/api/clients': ('_handle_get_clients', True),
+    '/api/events': ('_handle_events', True),
+}
+_GET_PATTERNS = [
+    (re.compile(r'^/api/client/(?P<client_id>[^/]+)/schedule$'), '_handle_client_schedule', True),
+    (re.compile(r'^/api/client/(?P<client_id>[^/]+)$'), '_handle_get_client', True),
+    (re.compile(r'^(?P<url>/static/[^/]+)$'), '_serve_asset', False),
+]
+
+# POST handlers additionally receive the decoded JSON body as the data argument
+_POST_ROUTES = {
+    '/login': ('_handle_login', False),
+    '/api/register_client': ('_handle_register_client', False),
+    '/api/add_client': ('_handle_add_client', True),
+    '/api/register_client_key': ('_handle_register_client_key', True),
+}
+_POST_PATTERNS = [
+    # Agents without a dashboard session are authenticated by _decrypt_payload()
+    (re.compile(r'^/api/client/(?P<client_id>[^/]+)/status$'), '_handle_client_status_update', False),
+    (re.compile(r'^/api/client/(?P<client_id>[^/]+)/backup/result$'), '_handle_backup_result', False),
+    (re.compile(r'^/api/client/(?P<client_id>[^/]+)/backup/start$'), '_handle_start_backup', True),
+]
+
+def match_route(routes, patterns, path):
+    """Find the handler for a path as (handler method, requires auth, keyword arguments), or None"""
+    route = routes.get(path)
+    if route is not None:
+        return route[0], route[1], {}
+    for pattern, handler_name, requires_auth in patterns:
+        match = pattern.match(path)
+        if match:
+            return handler_name, requires_auth, match.groupdict()
+    return None
+
+class ClientEvents:
+    """Fan-out of client change notifications to the dashboard's event streams
+    
+    Every stream occupies a request worker for as long as it is open, so only
+    max_streams may be open at once.
+    """
+    
+    def __init__(self, max_streams=4, max_pending=64):
+        self.max_streams = max_streams
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscribers = set()
+    
+    def subscribe(self):
+        """Return a queue receiving every published event, or None if too many are open"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_streams:
+                return None
+            events = queue.Queue(maxsize=self.max_pending)
+            self._subscribers.add(events)
+            return events
+    
+    def unsubscribe(self, events):
+        """Stop delivering events to a queue returned by subscribe()"""
+        with self._lock:
+            self._subscribers.discard(events)
+    
+    def publish(self, event):
+        """Queue an event for every subscriber, dropping it for any that has fallen behind"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for events in subscribers:
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                pass
+
+# Client record fields holding credentials; they are kept in clients.json but
+# never sent to the dashboard
+SECRET_CLIENT_FIELDS = frozenset({'temp_token', 'auth_token'})
+
+class ClientStore:
+    """Parsed contents of clients.json, reloaded only when the file changes on disk
+    
+    Writes are handed to a single background thread. After the first save it
+    waits flush_delay seconds, then coalesces every save requested meanwhile
+    into one atomic replace of the file.
+    
+    The short listing served by /api/clients is kept serialized and is only
+    rebuilt when a save reports that a client id or hostname changed. Single
+    records served by /api/client/<id> are kept serialized with an entity tag
+    until a save names that client.
+    """
+    
+    def __init__(self, path, flush_delay=1.0):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.lock = threading.RLock()
+        self._clients = None
+        self._index = None  # Serialized [{'id', 'hostname'}] listing
+        self._records = {}  # Client id -> (entity tag, serialized record)
+        self._mtime_ns = None
+        self._generation = 0  # Incremented by every save()
+        self._written = 0  # Generation last written to disk
+        self._queue = queue.Queue()
+        self._writer = None
+        self.events = ClientEvents()
+    
+    def load(self):
+        """Return the clients dictionary, re-reading the file if it was modified"""
+        with self.lock:
+            # Unwritten changes in memory take precedence over the file
+            if self._clients is not None and self._written != self._generation:
+                return self._clients
+            try:
+                mtime_ns = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                mtime_ns = None
+            if self._clients is None or mtime_ns != self._mtime_ns:
+                self._clients = self._read()
+                self._index = None
+                self._records.clear()
+                self._mtime_ns = mtime_ns
+            return self._clients
+    
+    def index(self):
+        """Return the serialized id/hostname listing of every client"""
+        with self.lock:
+            clients = self.load()
+            if self._index is None:
+                self._index = _dumps([{'id': client_id, 'hostname': client.get('hostname')}
+                                      for client_id, client in clients.items()])
+            return self._index
+    
+    def record(self, client_id):
+        """Return (entity tag, serialized record) for one client, or None if it does not exist"""
+        with self.lock:
+            clients = self.load()
+            cached = self._records.get(client_id)
+            if cached is None:
+                client = clients.get(client_id)
+                if client is None:
+                    return None
+                public = {name: value for name, value in client.items() if name not in SECRET_CLIENT_FIELDS}
+                public['id'] = client_id
+                body = _dumps(public)
+                etag = b'"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest().encode()
+                cached = self._records[client_id] = (etag, body)
+            return cached
+    
+    def save(self, client_id=None, index_changed=False):
+        """Schedule the cached clients dictionary to be written back to disk
+        
+        client_id names the changed client for the dashboard's event streams.
+        Pass index_changed=True when a client was added or removed, or its
+        hostname changed.
+        """
+        with self.lock:
+            self._generation += 1
+            if index_changed:
+                self._index = None
+            if client_id is None:
+                self._records.clear()
+            else:
+                self._records.pop(client_id, None)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name='clients-writer', daemon=True)
+                self._writer.start()
+        if client_id is not None:
+            self.events.publish({'client_id': client_id, 'index_changed': index_changed})
+        self._queue.put(None)
+    
+    def flush(self):
+        """Block until every scheduled save has reached the disk"""
+        self._queue.join()
+    
+    def _write_loop(self):
+        """Background writer: drain pending saves and write the file once per batch"""
+        while True:
+            pending = [self._queue.get()]
+            time.sleep(self.flush_delay)
+            while True:
+                try:
+                    pending.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write()
+            except Exception as e:
+                logger.error(f"Error writing clients file: {str(e)}")
+            finally:
+                for _ in pending:
+                    self._queue.task_done()
+    
+    def _write(self):
+        """Serialize a snapshot under the lock, then replace the file atomically
+        
+        The records are nested dicts that handlers mutate in place, so they are
+        serialized while the lock is held rather than from a shallow copy.
+        """
+        with self.lock:
+            generation = self._generation
+            data = _dumps(self._clients, indent=True)
+        
+        # The data is on disk before the rename makes it visible, so a crash
+        # leaves either the old file or the new one
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        
+        with self.lock:
+            self._mtime_ns = os.stat(self.path).st_mtime_ns
+            self._written = generation
+    
+    def _read(self):
+        """Parse the clients file, treating a missing or corrupted file as empty"""
+        try:
+            with open(self.path, 'rb') as f:
+                clients = _loads(f.read())
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            logger.warning("Invalid JSON in clients file. Resetting to empty dictionary.")
+            return {}
+        
+        if not isinstance(clients, dict):
+            logger.warning("Corrupted clients file found. Resetting to empty dictionary.")
+            return {}
+        
+        # Hold each backup history as a bounded deque while in memory
+        for client in clients.values():
+            if isinstance(client, dict) and isinstance(client.get('backup_history'), list):
+                client['backup_history'] = deque(client['backup_history'], maxlen=BACKUP_HISTORY_LENGTH)
+        return clients
 
 class ServerAPIHandler(http.server.SimpleHTTPRequestHandler):
+    # Keep connections open between requests; every response sets Content-Length
+    protocol_version = 'HTTP/1.1'
+    timeout = 30  # Seconds an idle keep-alive connection may hold its thread
+    disable_nagle_algorithm = True  # Set TCP_NODELAY so small responses are not held back by Nagle
+    # Collect the headers and body of each response and send them together
+    # when handle_one_request() flushes wfile at the end of the request
+    wbufsize = 64 * 1024
     encryption = None  # Class variable to store the encryption manager
-    users_file = os.path.expanduser('~/Lin-Win-Backup/clients/users.json')
+    public_key_pem = None  # Server public key, serialized once by setup_encryption()
+    _public_key_response = None  # /api/public_key response awaiting only the date, built by setup_encryption()
+    # Complete response to a CORS preflight request, filled with the date
+    _OPTIONS_RESPONSE = (
+        protocol_version.encode() + b' 200 OK\r\n'
+        b'Date: %b\r\n'
+        b'Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n'
+        b'Access-Control-Allow-Headers: Content-Type\r\n'
+        b'Content-Length: 0\r\n'
+        + COMMON_HEADERS +
+        b'\r\n'
+    )
+    _encryption_lock = threading.Lock()  # Guards the client key registry in the encryption manager
+    users_file = USERS_FILE
+    _users_lock = threading.Lock()  # Guards _users and serializes writes of the users file
+    _users = {}  # Username -> user record, in file order, loaded by load_users()
+    _token_index = {}  # token_digest(session token) -> (username, expiry time), built by load_users()
+    # Complete response for the {"status": "success"} replies of the client API,
+    # filled with the date
+    _SUCCESS_OK = _JSON_RESPONSE_TEMPLATE % (protocol_version.encode(), 200, b'OK', b'%b', 20, b'{"status":"success"}')
+    client_store = ClientStore(CLIENTS_FILE)
     
     def __init__(self, *args, **kwargs):
+        self._auth_ok = None
         super().__init__(*args, **kwargs)
     
+    def parse_request(self):
+        """Parse a new request, forgetting per-request state from the previous one"""
+        self._auth_ok = None
+        return super().parse_request()
+    
+    def date_time_string(self, timestamp=None):
+        """Format a Date header value, using the per-second cache for the current time"""
+        if timestamp is None:
+            return http_date().decode()
+        return super().date_time_string(timestamp)
+    
+    def handle_expect_100(self):
+        """Send the interim 100 Continue right away instead of leaving it in the write buffer"""
+        result = super().handle_expect_100()
+        self.wfile.flush()
+        return result
+    
+    @classmethod
+    def setup_encryption(cls, encryption):
+        """Share one encryption manager between all handler instances"""
+        cls.encryption = encryption
+        cls.public_key_pem = encryption.get_public_key_pem().decode()
+        body = _dumps({'public_key': cls.public_key_pem})
+        # The date is left as a placeholder, so a % in the body is escaped
+        cls._public_key_response = _JSON_RESPONSE_TEMPLATE % (
+            cls.protocol_version.encode(), 200, b'OK', b'%b', len(body), body.replace(b'%', b'%%'))
+    
+    @classmethod
+    def load_users(cls):
+        """Load the users file and build the session token index from it
+        
+        The server is the only writer of the file, so it is read once at
+        startup and logins and logouts work on the records in memory.
+        Tokens saved by versions without session expiry get a full lifetime
+        from now.
+        """
+        default_expiry = time.time() + SESSION_LIFETIME
+        with cls._users_lock:
+            with open(cls.users_file, 'rb') as f:
+                users = _loads(f.read())
+            cls._users = {user['username']: user for user in users}
+            cls._token_index = {
+                token_digest(user['token']): (user['username'], user.get('token_expires', default_expiry))
+                for user in users if user.get('token')
+            }
+    
+    @classmethod
+    def _write_users(cls):
+        """Atomically replace the users file with the records in memory; call with _users_lock held"""
+        tmp_path = cls.users_file + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_dumps(list(cls._users.values()), indent=True))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, cls.users_file)
+    
+    def end_headers(self):
+        """Add the common CORS and security headers to every response"""
+        for name, value in COMMON_HEADER_ITEMS:
+            self.send_header(name, value)
+        super().end_headers()
+    
     def do_GET(self):
         """Handle GET requests"""
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
-        
-        # Serve web interface pages
-        if path == '/':
-            self._serve_login_page()
-        elif path == '/dashboard':
-            if not self._check_auth():
-                self._redirect_to_login()
-                return
-            self._serve_dashboard_page()
-        # API endpoints
-        elif path == '/api/public_key':
-            self._handle_public_key()
-        elif path == '/api/clients':
-            if not self._check_auth():
-                self._send_error(401, "Unauthorized")
-                return
-            self._handle_get_clients()
-        elif path.startswith('/api/client/'):
-            if not self._check_auth():
-                self._send_error(401, "Unauthorized")
-                return
-            client_id = path.split('/')[3]
-            if path.endswith('/status'):
-                self._handle_client_status(client_id)
-            elif path.endswith('/schedule'):
-                self._handle_client_schedule(client_id)
-            else:
-                self._handle_get_client(client_id)
-        else:
+        if not self._discard_body():
+            return
+        path = self.path.partition('?')[0]
+        
+        route = match_route(_GET_ROUTES, _GET_PATTERNS, path)
+        if route is None:
             # Serve static files
             super().do_GET()
+            return
+        
+        handler_name, requires_auth, kwargs = route
+        if requires_auth and not self._check_auth():
+            if handler_name == '_serve_dashboard_page':
+                self._redirect_to_login()
+            else:
+                self._send_error(401, "Unauthorized")
+            return
+        
+        self._dispatch(handler_name, **kwargs)
     
     def _serve_login_page(self):
         """Serve the login page"""
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        self.wfile.write(LOGIN_TEMPLATE.encode())
+        self._serve_page(LOGIN_PAGE)
     
     def _serve_dashboard_page(self):
         """Serve the dashboard page"""
+        self._serve_page(DASHBOARD_PAGE)
+    
+    def _serve_asset(self, url):
+        """Serve a stylesheet or script by its content-hashed URL"""
+        for asset in STATIC_ASSETS:
+            if asset.url == url:
+                self._serve_page(asset)
+                return
+        self._send_error(404, "Not found")
+    
+    def _serve_page(self, page):
+        """Send a static page, handing the file to the kernel where possible"""
+        accepted = accepted_encodings(self.headers.get('Accept-Encoding', ''))
+        if brotli is not None and 'br' in accepted:
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            encoding = 'gzip'
+        else:
+            encoding = None
+        
+        if encoding is not None:
+            data = page.compressed(encoding)
+            self.send_response(200)
+            self.send_header('Content-type', page.content_type)
+            self.send_header('Content-Encoding', encoding)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Cache-Control', page.cache_control)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        
+        data = page.data
         self.send_response(200)
-        self.send_header('Content-type', 'text/html')
+        self.send_header('Content-type', page.content_type)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Cache-Control', page.cache_control)
+        self.send_header('Content-Length', str(len(data)))
         self.end_headers()
-        self.wfile.write(DASHBOARD_TEMPLATE.encode())
+        
+        # socket.sendfile() falls back to seek+read on TLS sockets and on
+        # platforms without os.sendfile, which is not safe on a shared file
+        if page.file is not None and hasattr(os, 'sendfile') and type(self.connection) is socket.socket:
+            self._sendfile(page.file, 0, len(data))
+        else:
+            self.wfile.write(data)
+    
+    def copyfile(self, source, outputfile):
+        """Copy a static file to the client, letting the kernel do it on plain sockets"""
+        if hasattr(os, 'sendfile') and type(self.connection) is socket.socket and isinstance(source, io.BufferedReader):
+            self._sendfile(source)
+        else:
+            super().copyfile(source, outputfile)
+    
+    def _sendfile(self, file, offset=0, count=None):
+        """Send the buffered headers followed by a file through os.sendfile
+        
+        With TCP_NODELAY set the headers would leave as a segment of their own,
+        so on Linux the socket is corked until the whole file has been queued.
+        """
+        cork = getattr(socket, 'TCP_CORK', None)
+        if cork is not None:
+            self.connection.setsockopt(socket.IPPROTO_TCP, cork, 1)
+        try:
+            self.wfile.flush()
+            self.connection.sendfile(file, offset, count)
+        finally:
+            if cork is not None:
+                self.connection.setsockopt(socket.IPPROTO_TCP, cork, 0)
     
     def do_POST(self):
         """Handle POST requests"""
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
+        path = self.path.partition('?')[0]
         
         # Get request body
-        content_length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(content_length)
+        body = self._read_body()
+        if body is None:
+            return
+        
+        # Logout does not carry a request body
+        if path == '/logout':
+            self._handle_logout()
+            return
         
         # Handle empty request body
         if not body:
-            if path == '/logout':
-                self._handle_logout()
-                return
             self._send_error(400, "Empty request body")
             return
             
         try:
-            data = json.loads(body.decode())
+            data = _loads(body)
         except json.JSONDecodeError:
             self._send_error(400, "Invalid JSON in request body")
             return
-        
-        # Handle login
-        if path == '/login':
-            self._handle_login(data)
+        if not isinstance(data, dict):
+            self._send_error(400, "Request body must be a JSON object")
             return
         
-        # API endpoints
-        if path == '/api/register_client':
-            self._handle_register_client(data)
-        elif path == '/api/add_client':
-            if not self._check_auth():
-                self._send_error(401, "Unauthorized")
-                return
-            self._handle_add_client(data)
-        elif path == '/api/register_client_key':
-            if not self._check_auth():
-                return
-            
-            try:
-                data = json.loads(body)
-                client_id = data.get('client_id')
-                public_key = data.get('public_key')
-                
-                if not client_id or not public_key:
-                    self._send_json_response({'error': 'Missing client_id or public_key'}, 400)
-                    return
-                
-                # Store the client's public key
-                keys_dir = os.path.expanduser('~/Lin-Win-Backup/keys/clients')
-                os.makedirs(keys_dir, exist_ok=True)
-                
-                key_file = os.path.join(keys_dir, f'{client_id}.pub')
-                with open(key_file, 'w') as f:
-                    f.write(public_key)
-                
-                self._send_json_response({'status': 'success'})
-                
-            except Exception as e:
-                self._send_json_response({'error': str(e)}, 500)
-                return
-        elif path.startswith('/api/client/'):
-            if not self._check_auth():
-                self._send_error(401, "Unauthorized")
-                return
-            client_id = path.split('/')[3]
-            if path.endswith('/status'):
-                self._handle_client_status_update(client_id, data)
-            elif path.endswith('/backup/result'):
-                self._handle_backup_result(client_id, data)
-            elif path.endswith('/backup/start'):
-                self._handle_start_backup(client_id, data)
-            else:
-                self._send_error(404, "Not found")
-        else:
+        route = match_route(_POST_ROUTES, _POST_PATTERNS, path)
+        if route is None:
             self._send_error(404, "Not found")
+            return
+        
+        handler_name, requires_auth, kwargs = route
+        if requires_auth and not self._check_auth():
+            self._send_error(401, "Unauthorized")
+            return
+        
+        self._dispatch(handler_name, data=data, **kwargs)
+    
+    def _dispatch(self, handler_name, **kwargs):
+        """Run a route handler, answering errors it did not handle with a 500"""
+        try:
+            getattr(self, handler_name)(**kwargs)
+        except Exception:
+            logger.exception(f"Unhandled error in {handler_name}")
+            self._send_error(500, "Internal server error")
+    
+    def _read_body(self):
+        """Read the request body into a buffer sized by Content-Length
+        
+        Returns a bytearray, which the JSON parser accepts without a copy, or
+        None after an error response has been sent.
+        """
+        if 'Transfer-Encoding' in self.headers:
+            # Chunked bodies are not supported; the unread body would otherwise
+            # be parsed as the next request on this connection
+            self.close_connection = True
+            self._send_error(411, "Content-Length required")
+            return None
+        
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            self.close_connection = True
+            self._send_error(400, "Invalid Content-Length")
+            return None
+        if content_length > MAX_BODY_SIZE:
+            # The body is left unread, so the connection cannot be reused
+            self.close_connection = True
+            self._send_error(413, "Payload too large")
+            return None
+        
+        body = bytearray(content_length)
+        view = memoryview(body)
+        received = 0
+        while received < content_length:
+            count = self.rfile.readinto(view[received:])
+            if not count:
+                break
+            received += count
+        if received < content_length:
+            self.close_connection = True
+            self._send_error(400, "Incomplete request body")
+            return None
+        return body
+    
+    def _discard_body(self):
+        """Read and drop the body of a request that takes none
+        
+        Left unread, the body would be parsed as the next request on the
+        connection. Returns False after an error response has been sent.
+        """
+        if 'Content-Length' not in self.headers and 'Transfer-Encoding' not in self.headers:
+            return True
+        return self._read_body() is not None
     
     def _check_auth(self):
         """Check if user is authenticated"""
-        if 'Cookie' not in self.headers:
-            return False
-        
-        auth_cookie = self.headers['Cookie']
-        if not auth_cookie.startswith('auth_token='):
-            return False
-        
-        token = auth_cookie.split('=')[1].split(';')[0]
-        return self._verify_token(token)
+        if self._auth_ok is None:
+            token = self._get_auth_token()
+            self._auth_ok = token is not None and self._verify_token(token)
+        return self._auth_ok
+    
+    def _get_auth_token(self):
+        """Return the auth_token cookie value, or None if it is absent
+        
+        A precompiled regex is used rather than http.cookies.SimpleCookie, which
+        is implemented in pure Python and parses every cookie in the header.
+        """
+        match = _AUTH_COOKIE_RE.search(self.headers.get('Cookie', ''))
+        return match.group(1) if match else None
     
     def _verify_token(self, token):
         """Verify authentication token"""
-        try:
-            with open(self.users_file, 'r') as f:
-                users = json.load(f)
-                return any(user.get('token') == token for user in users)
-        except:
-            return False
+        session = self._token_index.get(token_digest(token))
+        return session is not None and session[1] > time.time()
     
     def _redirect_to_login(self):
         """Redirect to login page"""
         self.send_response(302)
         self.send_header('Location', '/')
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def _handle_login(self, data):
         """Handle login request"""
         username = data.get('username')
         password = data.get('password')
+        if not isinstance(password, str):
+            password = ''
         
         try:
-            with open(self.users_file, 'r') as f:
-                users = json.load(f)
-            
-            user = next((u for u in users if u['username'] == username), None)
-            
-            if user and self._verify_password(password, user['password']):
+            with self._users_lock:
+                user = self._users.get(username) if isinstance(username, str) else None
+                hashed_password = user['password'] if user is not None else None
+            
+            if user is None:
+                # Pay the same verification cost as for a real user
+                self._verify_password(password, _DUMMY_PASSWORD_HASH)
+            elif self._verify_login(username, password, hashed_password):
                 # Generate a new token
                 token = secrets.token_urlsafe(32)
-                user['token'] = token
+                expires = time.time() + SESSION_LIFETIME
                 
-                # Update the users file
-                with open(self.users_file, 'w') as f:
-                    json.dump(users, f, indent=2)
+                # Upgrade hashes from older versions now that the password is known
+                new_hash = hash_password(password) if password_needs_rehash(hashed_password) else None
                 
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Set-Cookie', f'auth_token={token}; Path=/; HttpOnly')
-                self.end_headers()
-                self.wfile.write(json.dumps({'success': True}).encode())
-            else:
-                self.send_response(401)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                self.wfile.write(json.dumps({'success': False, 'error': 'Invalid credentials'}).encode())
-        except Exception as e:
+                with self._users_lock:
+                    if user.get('token'):
+                        self._token_index.pop(token_digest(user['token']), None)
+                    user['token'] = token
+                    user['token_expires'] = expires
+                    if new_hash is not None:
+                        user['password'] = new_hash
+                    self._token_index[token_digest(token)] = (username, expires)
+                    self._write_users()
+                
+                self.log_request(200)
+                self.wfile.write(_LOGIN_OK_TEMPLATE % (self.protocol_version.encode(), http_date(), token.encode()))
+                return
+            
+            self.send_response(401)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(_LOGIN_FAILED_BODY)))
+            self.end_headers()
+            self.wfile.write(_LOGIN_FAILED_BODY)
+        except OSError as e:
+            # The users file could not be written
+            body = _dumps({'success': False, 'error': str(e)})
             self.send_response(500)
             self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
             self.end_headers()
-            self.wfile.write(json.dumps({'success': False, 'error': str(e)}).encode())
+            self.wfile.write(body)
     
     def _handle_logout(self):
         """Handle logout request"""
-        if 'Cookie' in self.headers:
-            auth_cookie = self.headers['Cookie']
-            if auth_cookie.startswith('auth_token='):
-                token = auth_cookie.split('=')[1].split(';')[0]
-                
-                try:
-                    with open(self.users_file, 'r') as f:
-                        users = json.load(f)
-                    
-                    # Remove the token from the user
-                    for user in users:
-                        if user.get('token') == token:
-                            user.pop('token', None)
-                    
-                    with open(self.users_file, 'w') as f:
-                        json.dump(users, f, indent=2)
-                except:
-                    pass
-        
-        self.send_response(200)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Set-Cookie', 'auth_token=; Path=/; HttpOnly; Max-Age=0')
-        self.end_headers()
-        self.wfile.write(json.dumps({'success': True}).encode())
+        token = self._get_auth_token()
+        if token is not None:
+            try:
+                with self._users_lock:
+                    # Only touch the users file if the token belongs to someone
+                    session = self._token_index.pop(token_digest(token), None)
+                    user = self._users.get(session[0]) if session is not None else None
+                    if user is not None:
+                        user.pop('token', None)
+                        user.pop('token_expires', None)
+                        self._write_users()
+            except OSError as e:
+                logger.error(f"Error removing token on logout: {str(e)}")
+        
+        self.log_request(200)
+        self.wfile.write(_LOGOUT_OK_TEMPLATE % (self.protocol_version.encode(), http_date()))
+    
+    def _verify_login(self, username, password, hashed_password):
+        """Verify a login, reusing a recent successful verification of the same credentials"""
+        password_digest = hashlib.sha256(_LOGIN_CACHE_SALT + password.encode()).digest()
+        cache_key = (username, password_digest, hashed_password)
+        if _LOGIN_CACHE.get(cache_key):
+            return True
+        
+        verified = self._verify_password(password, hashed_password)
+        if verified:
+            _LOGIN_CACHE.set(cache_key, True)
+        return verified
     
     def _verify_password(self, password, hashed_password):
         """Verify password against hash"""
-        return hashlib.sha256(password.encode()).hexdigest() == hashed_password
+        return verify_password(password, hashed_password)
     
     def _handle_public_key(self):
         """Handle request for server's public key"""
-        try:
-            public_key = self.encryption.get_server_public_key()
-            self._send_json_response({'public_key': public_key})
-        except Exception as e:
-            self._send_error(500, str(e))
+        self.log_request(200)
+        self.wfile.write(self._public_key_response % http_date())
     
     def _handle_register_client(self, data):
-        """Handle client registration"""
-        try:
-            client_id = data['client_id']
-            public_key = data['public_key']
+        """Handle client registration
+        
+        New client ids may register freely. Registering an id that already
+        exists replaces its keys, so it needs a dashboard session or the
+        client's temp_token from /api/add_client, which is used up by the
+        registration; the record is then updated rather than replaced,
+        keeping its backup history.
+        """
+        if any(field not in data for field in ('client_id', 'public_key', 'hostname', 'system', 'version')):
+            self._send_json_response({'error': 'Missing client registration fields'}, 400)
+            return
+        client_id = data['client_id']
+        public_key = data['public_key']
+        if not isinstance(client_id, str) or not isinstance(public_key, str):
+            self._send_error(400, "Invalid public key")
+            return
+        
+        # The existence check, key registration and record update happen under
+        # one hold of the store lock, so an id cannot appear in between
+        with self.client_store.lock:
+            clients = self.client_store.load()
+            client = clients.get(client_id)
+            if client is not None and not self._check_auth():
+                stored_token = client.get('temp_token')
+                temp_token = data.get('temp_token')
+                if not (isinstance(stored_token, str) and isinstance(temp_token, str)
+                        and hmac.compare_digest(temp_token.encode(), stored_token.encode())):
+                    self._send_error(401, "Unauthorized")
+                    return
             
-            # Register client's public key
-            self.encryption.register_client_public_key(client_id, public_key)
+            # Register client's public key and agree a session key for later
+            # encrypted requests, so they need no RSA decryption
+            with self._encryption_lock:
+                registered = self.encryption.register_client(client_id, public_key.encode())
+                session_key = self.encryption.create_session_key(client_id) if registered else None
+            if not registered:
+                self._send_error(400, "Invalid public key")
+                return
             
             # Save client info
-            clients_file = os.path.expanduser('~/Lin-Win-Backup/clients/clients.json')
-            os.makedirs(os.path.dirname(clients_file), exist_ok=True)
-            
-            clients = {}
-            if os.path.exists(clients_file):
-                with open(clients_file, 'r') as f:
-                    clients = json.load(f)
-            
-            clients[client_id] = {
+            if client is None:
+                client = clients[client_id] = {
+                    'current_backup': None,
+                    'next_scheduled': None,
+                    'backup_history': deque(maxlen=BACKUP_HISTORY_LENGTH)
+                }
+            client.update({
                 'hostname': data['hostname'],
                 'system': data['system'],
                 'version': data['version'],
-                'last_seen': datetime.now().isoformat(),
-                'current_backup': None,
-                'next_scheduled': None,
-                'backup_history': []
-            }
-            
-            with open(clients_file, 'w') as f:
-                json.dump(clients, f, indent=2)
-            
-            self._send_json_response({'status': 'success'})
-        except Exception as e:
-            self._send_error(500, str(e))
+                'last_seen': now_iso()
+            })
+            # The temporary token is good for one registration only
+            client.pop('temp_token', None)
+            self.client_store.save(client_id, index_changed=True)
+        
+        self._send_json_response({'status': 'success', 'session_key': session_key})
     
-    def _handle_client_status_update(self, client_id, data):
-        """Handle client status update"""
+    def _handle_register_client_key(self, data):
+        """Handle registration of a client's public key file"""
         try:
-            # Update client info
-            clients_file = os.path.expanduser('~/Lin-Win-Backup/clients/clients.json')
-            with open(clients_file, 'r') as f:
-                clients = json.load(f)
+            client_id = data.get('client_id')
+            public_key = data.get('public_key')
             
-            if client_id not in clients:
-                self._send_error(404, "Client not found")
+            if not client_id or not public_key:
+                self._send_json_response({'error': 'Missing client_id or public_key'}, 400)
                 return
             
-            # Update client status
-            clients[client_id].update({
-                'last_seen': datetime.now().isoformat(),
-                'current_backup': data.get('current_backup'),
-                'system': data.get('system'),
-                'version': data.get('version'),
-                'hostname': data.get('hostname')
-            })
+            # Store the client's public key
+            key_file = os.path.join(CLIENT_KEYS_DIR, f'{client_id}.pub')
+            with open(key_file, 'w') as f:
+                f.write(public_key)
             
-            with open(clients_file, 'w') as f:
-                json.dump(clients, f, indent=2)
+            self._send_success()
             
-            self._send_json_response({'status': 'success'})
-        except Exception as e:
-            logger.error(f"Error updating client status: {str(e)}")
-            self._send_error(500, str(e))
+        except OSError as e:
+            self._send_json_response({'error': str(e)}, 500)
+    
+    def _decrypt_payload(self, client_id, data):
+        """Unwrap a request sent as {"encrypted_data": ...}
+        
+        Payloads marked "encryption": "aes-gcm" use the session key handed out
+        at registration; others are RSA encrypted to the server key. The
+        decrypted bytes are handed straight to the JSON parser. Plain requests
+        are returned unchanged; None means an error was sent.
+        
+        Without a dashboard session only aes-gcm payloads are accepted: the
+        session key is known to this client alone, and the client id is bound
+        as associated data, so a payload that decrypts comes from the client.
+        """
+        sealed = 'encrypted_data' in data and data.get('encryption') == 'aes-gcm'
+        if not sealed and not self._check_auth():
+            self._send_error(401, "Unauthorized")
+            return None
+        if 'encrypted_data' not in data:
+            return data
+        
+        encrypted_data = data['encrypted_data']
+        scheme = data.get('encryption')
+        if isinstance(encrypted_data, str):
+            # Retried requests carry the same ciphertext; reuse the parsed result
+            cache_key = (client_id, scheme, hashlib.blake2b(encrypted_data.encode(), digest_size=16).digest())
+            cached = _DECRYPTED_PAYLOAD_CACHE.get(cache_key)
+            if cached is not None:
+                return cached
+        else:
+            cache_key = None
+        
+        if scheme == 'aes-gcm':
+            decrypted = self.encryption.decrypt_session_data(client_id, encrypted_data)
+        else:
+            decrypted = self.encryption.decrypt_from_client(encrypted_data)
+        if decrypted is None:
+            self._send_error(400, "Invalid encrypted data")
+            return None
+        try:
+            data = _loads(decrypted)
+        except json.JSONDecodeError:
+            data = None
+        if not isinstance(data, dict):
+            self._send_error(400, "Invalid encrypted data")
+            return None
+        if cache_key is not None:
+            _DECRYPTED_PAYLOAD_CACHE.set(cache_key, data)
+        return data
+    
+    def _handle_client_status_update(self, client_id, data):
+        """Handle client status update"""
+        data = self._decrypt_payload(client_id, data)
+        if data is None:
+            return
+        
+        # Update client info
+        with self.client_store.lock:
+            clients = self.client_store.load()
+            found = client_id in clients
+            if found:
+                client = clients[client_id]
+                hostname_changed = client.get('hostname') != data.get('hostname')
+                client.update({
+                    'last_seen': now_iso(),
+                    'current_backup': data.get('current_backup'),
+                    'system': data.get('system'),
+                    'version': data.get('version'),
+                    'hostname': data.get('hostname')
+                })
+                self.client_store.save(client_id, index_changed=hostname_changed)
+        
+        if not found:
+            self._send_error(404, "Client not found")
+            return
+        
+        self._send_success()
     
     def _handle_client_schedule(self, client_id):
         """Handle request for client's backup schedule"""
         try:
-            clients_file = os.path.expanduser('~/Lin-Win-Backup/clients/clients.json')
-            with open(clients_file, 'r') as f:
-                clients = json.load(f)
+            with self.client_store.lock:
+                client = self.client_store.load().get(client_id)
+                next_scheduled = client.get('next_scheduled') if client is not None else None
             
-            if client_id not in clients:
+            if client is None:
                 self._send_error(404, "Client not found")
                 return
             
             schedule = {
-                'next_scheduled': clients[client_id].get('next_scheduled')
+                'next_scheduled': next_scheduled
             }
             
             # Encrypt the schedule data
-            encrypted_data = self.encryption.encrypt_for_client(client_id, json.dumps(schedule))
+            encrypted_data = self.encryption.encrypt_for_client(client_id, _dumps(schedule))
             self._send_json_response({'encrypted_data': encrypted_data})
-        except Exception as e:
-            self._send_error(500, str(e))
+        except ValueError as e:
+            # The client has not registered a public key
+            self._send_error(400, str(e))
     
     def _handle_backup_result(self, client_id, data):
         """Handle backup result report"""
-        try:
-            # Update client info
-            clients_file = os.path.expanduser('~/Lin-Win-Backup/clients/clients.json')
-            with open(clients_file, 'r') as f:
-                clients = json.load(f)
-            
-            if client_id not in clients:
-                self._send_error(404, "Client not found")
-                return
-            
-            # Add to backup history
-            backup_result = data.get('backup_result')
-            if backup_result:
-                if 'backup_history' not in clients[client_id]:
-                    clients[client_id]['backup_history'] = []
-                clients[client_id]['backup_history'].append(backup_result)
-                # Keep only last 10 backups
-                clients[client_id]['backup_history'] = clients[client_id]['backup_history'][-10:]
-            
-            # Clear current backup if this was the one in progress
-            if (clients[client_id].get('current_backup', {}).get('start_time') == 
-                backup_result.get('start_time')):
-                clients[client_id]['current_backup'] = None
-            
-            with open(clients_file, 'w') as f:
-                json.dump(clients, f, indent=2)
-            
-            self._send_json_response({'status': 'success'})
-        except Exception as e:
-            logger.error(f"Error handling backup result: {str(e)}")
-            self._send_error(500, str(e))
+        data = self._decrypt_payload(client_id, data)
+        if data is None:
+            return
+        backup_result = data.get('backup_result')
+        if backup_result is not None and not isinstance(backup_result, dict):
+            self._send_json_response({'error': 'Invalid backup result'}, 400)
+            return
+        
+        # Update client info
+        with self.client_store.lock:
+            clients = self.client_store.load()
+            found = client_id in clients
+            if found:
+                client = clients[client_id]
+                if backup_result:
+                    # Add to backup history; the deque drops the oldest entries
+                    if client.get('backup_history') is None:
+                        client['backup_history'] = deque(maxlen=BACKUP_HISTORY_LENGTH)
+                    client['backup_history'].append(backup_result)
+                    
+                    # Clear current backup if this was the one in progress
+                    current_backup = client.get('current_backup') or {}
+                    if current_backup.get('start_time') == backup_result.get('start_time'):
+                        client['current_backup'] = None
+                self.client_store.save(client_id)
+        
+        if not found:
+            self._send_error(404, "Client not found")
+            return
+        
+        self._send_success()
     
     def _handle_start_backup(self, client_id, data):
-        """Handle request to start a backup on a client"""
-        try:
-            # Validate backup type
-            backup_type = data.get('type')
-            if backup_type not in ['full', 'incremental', 'directory']:
-                return self._send_json_response({'error': 'Invalid backup type'}, 400)
-            
-            # Validate source directory for directory backup
-            source_dir = data.get('source_dir')
-            if backup_type == 'directory' and not source_dir:
-                return self._send_json_response({'error': 'Source directory required for directory backup'}, 400)
-            
-            # Load client info
-            clients_file = os.path.expanduser('~/Lin-Win-Backup/clients/clients.json')
-            with open(clients_file, 'r') as f:
-                clients = json.load(f)
-            
-            if client_id not in clients:
+        """Handle request to start a backup on a client
+        
+        The client is marked as backing up and 202 is returned straight away;
+        the request to the client is sent in the background by
+        _send_backup_start().
+        """
+        # Validate backup type
+        backup_type = data.get('type')
+        if backup_type not in ['full', 'incremental', 'directory']:
+            return self._send_json_response({'error': 'Invalid backup type'}, 400)
+        
+        # Validate source directory for directory backup
+        source_dir = data.get('source_dir')
+        if backup_type == 'directory' and not source_dir:
+            return self._send_json_response({'error': 'Source directory required for directory backup'}, 400)
+        
+        # Prepare backup request
+        backup_request = {
+            'type': backup_type,
+            'source_dir': source_dir if backup_type == 'directory' else None,
+            'start_time': datetime.now().isoformat()
+        }
+        
+        # Claim the client for this backup
+        with self.client_store.lock:
+            client = self.client_store.load().get(client_id)
+            if client is None:
                 return self._send_json_response({'error': 'Client not found'}, 404)
             
             # Check if client is already running a backup
-            if clients[client_id].get('current_backup'):
+            if client.get('current_backup'):
                 return self._send_json_response({'error': 'Client is already running a backup'}, 400)
             
-            # Prepare backup request
-            backup_request = {
-                'type': backup_type,
-                'source_dir': source_dir if backup_type == 'directory' else None,
-                'start_time': datetime.now().isoformat()
-            }
-            
-            # Update client status
-            clients[client_id]['current_backup'] = backup_request
-            
-            # Save updated client info
-            with open(clients_file, 'w') as f:
-                json.dump(clients, f, indent=2)
-            
-            # Send backup request to client
-            response = requests.post(
-                f"{clients[client_id]['server_url']}/api/backup/start",
+            client['current_backup'] = backup_request
+            self.client_store.save(client_id)
+            server_url = client.get('server_url')
+            auth_token = client.get('auth_token')
+        
+        _BACKUP_START_EXECUTOR.submit(self._send_backup_start, client_id, server_url, auth_token, backup_request)
+        self._send_json_response({'status': 'accepted', 'message': 'Backup start requested'}, 202)
+    
+    @classmethod
+    def _send_backup_start(cls, client_id, server_url, auth_token, backup_request):
+        """Ask a client to run a claimed backup, releasing the claim if it does not start
+        
+        A failed start is recorded in the backup history, where the dashboard
+        shows it once the change event arrives.
+        """
+        try:
+            response = _CLIENT_SESSION.post(
+                f"{server_url}/api/backup/start",
                 json=backup_request,
-                headers={'Authorization': f'Bearer {clients[client_id]["auth_token"]}'}
+                headers={'Authorization': f'Bearer {auth_token}'},
+                timeout=CLIENT_REQUEST_TIMEOUT
             )
-            
-            if response.status_code == 200:
-                return self._send_json_response({'status': 'success', 'message': 'Backup started'})
-            else:
-                # Revert client status if backup start failed
-                clients[client_id]['current_backup'] = None
-                with open(clients_file, 'w') as f:
-                    json.dump(clients, f, indent=2)
-                return self._send_json_response({'error': 'Failed to start backup on client'}, 500)
-            
-        except Exception as e:
-            logger.error(f"Error starting backup: {str(e)}")
-            return self._send_json_response({'error': str(e)}, 500)
+            started = response.status_code == 200
+        except requests.RequestException as e:
+            logger.error(f"Error contacting client {client_id}: {str(e)}")
+            started = False
+        
+        if started:
+            return
+        
+        # Revert client status if backup start failed
+        with cls.client_store.lock:
+            client = cls.client_store.load().get(client_id)
+            if client is not None and client.get('current_backup') is backup_request:
+                client['current_backup'] = None
+                if client.get('backup_history') is None:
+                    client['backup_history'] = deque(maxlen=BACKUP_HISTORY_LENGTH)
+                client['backup_history'].append(dict(
+                    backup_request, status='failed', end_time=datetime.now().isoformat(),
+                    error='Failed to start backup on client'))
+                cls.client_store.save(client_id)
     
     def _send_json_response(self, data, status_code=200):
         """Send JSON response with optional status code"""
-        self.send_response(status_code)
-        self.send_header('Content-type', 'application/json')
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
+        self._send_fast_json(_dumps(data), status_code)
+    
+    def _send_fast_json(self, payload, status_code=200):
+        """Send an already serialized JSON body as one preformatted write"""
+        self.log_request(status_code)
+        self.wfile.write(_JSON_RESPONSE_TEMPLATE % (
+            self.protocol_version.encode(), status_code,
+            self.responses[status_code][0].encode(), http_date(), len(payload), payload))
+    
+    def _send_success(self):
+        """Send the canned {"status": "success"} response"""
+        self.log_request(200)
+        self.wfile.write(self._SUCCESS_OK % http_date())
     
     def _send_error(self, code, message):
         """Send error response"""
-        self.send_response(code)
-        self.send_header('Content-type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps({'error': message}).encode())
+        body = _ERROR_BODIES.get(message)
+        if body is None:
+            body = _dumps({'error': message})
+        self._send_fast_json(body, code)
+    
+    def do_HEAD(self):
+        """Handle HEAD requests for static files"""
+        if self._discard_body():
+            super().do_HEAD()
     
     def do_OPTIONS(self):
         """Handle OPTIONS requests for CORS"""
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+        if not self._discard_body():
+            return
+        self.log_request(200)
+        self.wfile.write(self._OPTIONS_RESPONSE % http_date())
     
     def _handle_get_clients(self):
-        """Handle request to get all clients"""
+        """Handle request to get the id and hostname of every client
+        
+        Full records are served by /api/client/<id>.
+        """
+        self._send_fast_json(self.client_store.index())
+    
+    def _handle_events(self):
+        """Stream a Server-Sent Event for every change to a client record
+        
+        Each event names the client and whether the client listing changed; the
+        dashboard fetches whatever it displays. The stream ends when a write
+        fails because the browser went away, which takes up to two keepalive
+        intervals to notice, and when the session it was opened with is
+        logged out or expires, which is checked before every write.
+        """
+        token = self._get_auth_token()
+        events = self.client_store.events.subscribe()
+        if events is None:
+            self._send_error(503, "Too many event streams")
+            return
+        
+        # The body has no length, so it ends when the connection is closed
+        self.close_connection = True
         try:
-            clients_file = os.path.expanduser('~/Lin-Win-Backup/clients/clients.json')
-            if not os.path.exists(clients_file):
-                self._send_json_response([])
-                return
-            
-            with open(clients_file, 'r') as f:
-                clients = json.load(f)
-            
-            # Ensure clients is a dictionary
-            if not isinstance(clients, dict):
-                clients = {}
-                # Save empty dictionary if file was corrupted
-                with open(clients_file, 'w') as f:
-                    json.dump(clients, f, indent=2)
-            
-            # Convert clients dict to list with id field
-            clients_list = []
-            for client_id, client_data in clients.items():
-                client_data['id'] = client_id
-                clients_list.append(client_data)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            self.wfile.flush()
             
-            self._send_json_response(clients_list)
-        except Exception as e:
-            logger.error(f"Error getting clients: {str(e)}")
-            self._send_error(500, str(e))
+            # Events bypass wfile's buffer, which would otherwise still hold
+            # the failed write when the connection is finished
+            while True:
+                try:
+                    event = events.get(timeout=EVENT_KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    event = None
+                if token is None or not self._verify_token(token):
+                    break
+                if event is None:
+                    # Comment line, so that a closed connection is noticed
+                    self.connection.sendall(b': keepalive\n\n')
+                else:
+                    self.connection.sendall(b'data: ' + _dumps(event) + b'\n\n')
+        except OSError:
+            pass
+        finally:
+            self.client_store.events.unsubscribe(events)
     
     def _handle_get_client(self, client_id):
-        """Handle request to get a specific client"""
-        try:
-            clients_file = os.path.expanduser('~/Lin-Win-Backup/clients/clients.json')
-            if not os.path.exists(clients_file):
-                self._send_error(404, "Client not found")
-                return
-            
-            with open(clients_file, 'r') as f:
-                clients = json.load(f)
-            
-            # Ensure clients is a dictionary
-            if not isinstance(clients, dict):
-                clients = {}
-                # Save empty dictionary if file was corrupted
-                with open(clients_file, 'w') as f:
-                    json.dump(clients, f, indent=2)
-            
-            if client_id not in clients:
-                self._send_error(404, "Client not found")
-                return
-            
-            client_data = clients[client_id]
-            client_data['id'] = client_id
-            self._send_json_response(client_data)
-        except Exception as e:
-            logger.error(f"Error getting client {client_id}: {str(e)}")
-            self._send_error(500, str(e))
+        """Handle request to get a specific client
+        
+        The dashboard re-fetches the selected client on every change event;
+        a record it already holds is answered with 304 and no body.
+        """
+        record = self.client_store.record(client_id)
+        if record is None:
+            self._send_error(404, "Client not found")
+            return
+        
+        etag, body = record
+        # Matches a plain tag, a W/ weak form and a comma-separated list
+        if etag.decode() in self.headers.get('If-None-Match', ''):
+            self.log_request(304)
+            self.wfile.write(_NOT_MODIFIED_TEMPLATE % (self.protocol_version.encode(), http_date(), etag))
+            return
+        
+        self.log_request(200)
+        self.wfile.write(_CLIENT_RESPONSE_TEMPLATE % (self.protocol_version.encode(), http_date(), etag, len(body), body))
 
     def _handle_add_client(self, data):
         """Handle adding a new client"""
+        ip = data.get('ip')
+        friendly_name = data.get('friendly_name')
+        
+        if not ip:
+            return self._send_json_response({'error': 'IP address is required'}, 400)
+        
+        # Validate IP address (IPv4 or IPv6) and store it in canonical form
         try:
-            ip = data.get('ip')
-            friendly_name = data.get('friendly_name')
-            
-            if not ip:
-                return self._send_json_response({'error': 'IP address is required'}, 400)
-            
-            # Validate IP address
+            ip = str(ipaddress.ip_address(ip))
+        except ValueError:
+            return self._send_json_response({'error': 'Invalid IP address'}, 400)
+        
+        # Try to resolve hostname; if the lookup is slow the client is added
+        # under its IP and the hostname is filled in when the lookup finishes
+        hostname = _HOSTNAME_CACHE.get(ip)
+        lookup = None
+        if hostname is None:
+            lookup = _DNS_EXECUTOR.submit(resolve_hostname, ip)
             try:
-                socket.inet_aton(ip)
-            except socket.error:
-                return self._send_json_response({'error': 'Invalid IP address'}, 400)
-            
-            # Try to resolve hostname
-            try:
-                hostname = socket.gethostbyaddr(ip)[0]
-            except socket.herror:
+                hostname = lookup.result(timeout=HOSTNAME_LOOKUP_TIMEOUT)
+                lookup = None
+            except concurrent.futures.TimeoutError:
                 hostname = ip
+        
+        # Generate a unique client ID
+        client_id = hashlib.blake2b(f"{ip}{hostname}".encode(), digest_size=6).hexdigest()
+        
+        # Generate a temporary token for initial key exchange; it is kept in
+        # the client record and written out with the rest of clients.json
+        temp_token = secrets.token_urlsafe(32)
+        
+        with self.client_store.lock:
+            clients = self.client_store.load()
             
-            # Generate a unique client ID
-            client_id = hashlib.sha256(f"{ip}{hostname}".encode()).hexdigest()[:12]
-            
-            # Load existing clients
-            clients_file = os.path.expanduser('~/Lin-Win-Backup/clients/clients.json')
-            os.makedirs(os.path.dirname(clients_file), exist_ok=True)
-            
-            clients = {}  # Default to empty dictionary
-            if os.path.exists(clients_file):
-                try:
-                    with open(clients_file, 'r') as f:
-                        loaded_clients = json.load(f)
-                        # Ensure loaded data is a dictionary
-                        if isinstance(loaded_clients, dict):
-                            clients = loaded_clients
-                        else:
-                            logger.warning(f"Corrupted clients file found. Resetting to empty dictionary.")
-                except json.JSONDecodeError:
-                    logger.warning(f"Invalid JSON in clients file. Resetting to empty dictionary.")
-            
-            # Check if client already exists
-            if client_id in clients:
+            # Check if client already exists; clients added by older versions
+            # have SHA-256 based ids, so compare the address as well
+            if client_id in clients or any(
+                    client.get('ip') == ip and client.get('hostname') == hostname
+                    for client in clients.values()):
                 return self._send_json_response({'error': 'Client already exists'}, 400)
             
             # Add new client
@@ -1452,87 +1566,286 @@ class ServerAPIHandler(http.server.SimpleHTTPRequestHandler):
                 'version': 'Unknown',
                 'last_seen': None,
                 'current_backup': None,
-                'schedules': []
+                'schedules': [],
+                'temp_token': temp_token
             }
             
             # Save updated clients
-            with open(clients_file, 'w') as f:
-                json.dump(clients, f, indent=2)
-            
-            # Generate a temporary token for initial key exchange
-            temp_token = secrets.token_urlsafe(32)
-            temp_token_file = os.path.join(os.path.dirname(clients_file), f'{client_id}.token')
-            with open(temp_token_file, 'w') as f:
-                f.write(temp_token)
-            
-            logger.info(f"Added new client: {client_id} ({ip})")
-            return self._send_json_response({
-                'status': 'success',
-                'client_id': client_id,
-                'temp_token': temp_token
-            })
-            
-        except Exception as e:
-            logger.error(f"Error adding client: {str(e)}")
-            return self._send_json_response({'error': str(e)}, 500)
+            self.client_store.save(client_id, index_changed=True)
+        
+        if lookup is not None:
+            lookup.add_done_callback(functools.partial(self._apply_resolved_hostname, client_id, ip))
+        
+        logger.info(f"Added new client: {client_id} ({ip})")
+        return self._send_json_response({
+            'status': 'success',
+            'client_id': client_id,
+            'temp_token': temp_token
+        })
+
+    @classmethod
+    def _apply_resolved_hostname(cls, client_id, ip, lookup):
+        """Record a hostname whose lookup finished after the client was added"""
+        hostname = lookup.result()
+        if hostname == ip:
+            return
+        with cls.client_store.lock:
+            client = cls.client_store.load().get(client_id)
+            if client is not None and client.get('hostname') == ip:
+                client['hostname'] = hostname
+                cls.client_store.save(client_id, index_changed=True)
+
+# Default number of request worker threads kept ready for new connections
+DEFAULT_HTTP_THREADS = max(16, (os.cpu_count() or 1) * 4)
+# Threads kept ready for TLS handshakes. The crypto is CPU bound and releases the
+# GIL; the extra threads cover handshakes stalled waiting on slow peers
+DEFAULT_TLS_THREADS = max(4, (os.cpu_count() or 1) * 2)
+# Seconds a new connection gets to finish its TLS handshake
+TLS_HANDSHAKE_TIMEOUT = 10
+# Most threads started beyond the pools for connections arriving while every
+# worker is taken; connections past that are turned away with a 503
+DEFAULT_OVERFLOW_THREADS = 512
+
+class PooledHTTPServer(http.server.ThreadingHTTPServer):
+    """HTTP server handling connections on a pool of reusable worker threads
+    
+    Each keep-alive connection occupies a worker until it closes or idles out.
+    A connection arriving while every worker is taken gets a thread of its own
+    instead of waiting, so idle connections can never stall other clients.
+    Those extra threads are capped at max_overflow across both pools; past
+    that, new connections are answered with a 503 and closed. All threads are
+    daemon threads so that idle connections do not hold up interpreter exit.
+    
+    With an SSL context, accepted connections first go through a separate
+    pool that performs the TLS handshake, so neither the accept loop nor the
+    request workers wait on slow handshakes. It grows the same way, so peers
+    that stall their handshakes cannot hold up other clients either.
+    """
+    request_queue_size = 1024  # Listen backlog, capped by net.core.somaxconn; the socketserver default is 5
+    # Filled with the date
+    _BUSY_RESPONSE = (
+        b'HTTP/1.1 503 Service Unavailable\r\n'
+        b'Date: %b\r\n'
+        b'Content-Length: 0\r\n'
+        b'Retry-After: 1\r\n'
+        b'Connection: close\r\n'
+        b'\r\n'
+    )
+    
+    def __init__(self, server_address, handler_class, max_workers=DEFAULT_HTTP_THREADS,
+                 ssl_context=None, tls_workers=DEFAULT_TLS_THREADS, max_overflow=DEFAULT_OVERFLOW_THREADS):
+        if ':' in server_address[0]:
+            self.address_family = socket.AF_INET6
+        self.ssl_context = ssl_context
+        self.max_overflow = max_overflow
+        self._idle_lock = threading.Lock()
+        self._overflow = 0  # Threads running beyond the pools, guarded by _idle_lock
+        # Pool name -> queued connections, and the number of its workers not
+        # reserved for a connection
+        self._jobs = {'http': queue.Queue(), 'tls': queue.Queue()}
+        self._idle = {'http': max_workers, 'tls': tls_workers if ssl_context is not None else 0}
+        for pool, target in (('http', self.process_request_thread), ('tls', self._handshake)):
+            for i in range(self._idle[pool]):
+                threading.Thread(target=self._worker, args=(pool, target), name=f'{pool}-{i}', daemon=True).start()
+        super().__init__(server_address, handler_class)
+    
+    def server_bind(self):
+        """Accept IPv4 connections on an IPv6 socket as well, where supported"""
+        if self.address_family == socket.AF_INET6 and socket.has_dualstack_ipv6():
+            self.socket.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 0)
+        super().server_bind()
+    
+    def process_request(self, request, client_address):
+        """Hand the connection to a pool worker instead of a new thread"""
+        if self.ssl_context is not None:
+            self._dispatch('tls', self._handshake, request, client_address)
+        else:
+            self._dispatch('http', self.process_request_thread, request, client_address)
+    
+    def _dispatch(self, pool, target, request, client_address):
+        """Queue a connection for an idle worker of a pool, or start a thread for it if there is none
+        
+        When the overflow threads are used up as well the connection is refused.
+        """
+        with self._idle_lock:
+            reserved = self._idle[pool] > 0
+            if reserved:
+                self._idle[pool] -= 1
+            overflow = not reserved and self._overflow < self.max_overflow
+            if overflow:
+                self._overflow += 1
+        if reserved:
+            self._jobs[pool].put((request, client_address))
+        elif overflow:
+            threading.Thread(target=self._overflow_thread, args=(target, request, client_address), daemon=True).start()
+        else:
+            self._refuse(pool, request, client_address)
+    
+    def _worker(self, pool, target):
+        """Run target on the connections queued for a pool until the process exits"""
+        while True:
+            target(*self._jobs[pool].get())
+            with self._idle_lock:
+                self._idle[pool] += 1
+    
+    def _overflow_thread(self, target, request, client_address):
+        """Run target on one connection in a thread of its own"""
+        try:
+            target(request, client_address)
+        finally:
+            with self._idle_lock:
+                self._overflow -= 1
+    
+    def _refuse(self, pool, request, client_address):
+        """Close a connection the server has no thread for
+        
+        Connections that speak HTTP already get a 503 first; one still waiting
+        for its TLS handshake is closed as it is. The response fits in the
+        empty send buffer of a new connection, so the write does not block.
+        """
+        logger.warning(f"Refusing connection from {client_address[0]}: all {self.max_overflow} overflow threads are busy")
+        if pool == 'http':
+            try:
+                request.settimeout(1)
+                request.sendall(self._BUSY_RESPONSE % http_date())
+            except OSError:
+                pass
+        self.shutdown_request(request)
+    
+    def _handshake(self, request, client_address):
+        """Wrap a connection in TLS and pass it on to the request workers
+        
+        The timeout bounds the whole handshake, not each read within it.
+        """
+        try:
+            request.settimeout(TLS_HANDSHAKE_TIMEOUT)
+            request = self.ssl_context.wrap_socket(request, server_side=True)
+        except OSError as e:
+            logger.debug(f"TLS handshake with {client_address[0]} failed: {str(e)}")
+            self.shutdown_request(request)
+            return
+        self._dispatch('http', self.process_request_thread, request, client_address)
+
+def local_url_hosts(include_ipv6=False):
+    """List this machine's interface addresses in the form used as a URL host
+    
+    Read from the interface table rather than resolved through DNS, which can
+    hang for seconds on a misconfigured network. Loopback and link-local
+    addresses are left out, and IPv6 addresses are put in brackets.
+    """
+    families = (socket.AF_INET, socket.AF_INET6) if include_ipv6 else (socket.AF_INET,)
+    try:
+        interfaces = psutil.net_if_addrs()
+    except OSError as e:
+        logger.warning(f"Could not list network interfaces: {str(e)}")
+        return ['0.0.0.0']
+    
+    hosts = []
+    for addresses in interfaces.values():
+        for address in addresses:
+            if address.family not in families:
+                continue
+            try:
+                ip = ipaddress.ip_address(address.address.partition('%')[0])
+            except ValueError:
+                continue
+            if ip.is_loopback or ip.is_link_local:
+                continue
+            hosts.append(f'[{ip}]' if ip.version == 6 else str(ip))
+    return hosts
+
+def build_ssl_context(certfile, keyfile):
+    """Create the TLS context shared by every connection
+    
+    Only TLS 1.3 is offered, which needs a single round trip for a full
+    handshake. Session IDs and tickets stay enabled so reconnecting backup
+    clients resume their session instead of doing a full handshake.
+    """
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.minimum_version = ssl.TLSVersion.TLSv1_3
+    context.load_cert_chain(certfile, keyfile)
+    context.options &= ~ssl.OP_NO_TICKET
+    return context
 
-def run_server(port=3000):
-    """Run the server"""
+def run_server(port=3000, http_threads=DEFAULT_HTTP_THREADS, ssl_context=None, overflow_threads=DEFAULT_OVERFLOW_THREADS):
+    """Run the server, over HTTPS when an SSL context is given"""
     # Create necessary directories
-    os.makedirs(os.path.expanduser('~/Lin-Win-Backup/clients'), exist_ok=True)
-    os.makedirs(os.path.expanduser('~/Lin-Win-Backup/keys/server'), exist_ok=True)
-    
-    # Create users file if it doesn't exist
-    users_file = os.path.expanduser('~/Lin-Win-Backup/clients/users.json')
-    if not os.path.exists(users_file):
-        # Create default admin user
-        default_users = [
-            {
-                "username": "admin",
-                "password": hashlib.sha256("admin".encode()).hexdigest(),
-                "role": "admin"
-            }
-        ]
-        with open(users_file, 'w') as f:
-            json.dump(default_users, f, indent=2)
+    os.makedirs(CLIENTS_DIR, exist_ok=True)
+    os.makedirs(CLIENT_KEYS_DIR, exist_ok=True)
+    os.makedirs(SERVER_KEYS_DIR, exist_ok=True)
+    
+    # Create users file with a default admin user if it doesn't exist; the
+    # exclusive open both checks for and creates the file
+    try:
+        with open(USERS_FILE, 'xb') as f:
+            default_users = [
+                {
+                    "username": "admin",
+                    "password": hash_password("admin"),
+                    "role": "admin"
+                }
+            ]
+            f.write(_dumps(default_users, indent=True))
+    except FileExistsError:
+        pass
     
-    # Initialize encryption manager
-    encryption = EncryptionManager()
+    # Initialize the encryption manager shared by all request handlers
+    ServerAPIHandler.setup_encryption(EncryptionManager())
+    ServerAPIHandler.load_users()
     
-    # Set the encryption manager as a class variable
-    ServerAPIHandler.encryption = encryption
+    # Write out any client changes still waiting for the writer on exit
+    atexit.register(ServerAPIHandler.client_store.flush)
     
     # Start server
-    with socketserver.TCPServer(("0.0.0.0", port), ServerAPIHandler) as httpd:
-        print(f"Server started on port {port}")
-        print("Local access: http://localhost:3000")
-        
-        # Get all IP addresses
-        hostname = socket.gethostname()
-        ip_addresses = socket.gethostbyname_ex(hostname)[2]
-        for ip in ip_addresses:
-            print(f"Network access: http://{ip}:3000")
+    # Persistent connections need a thread each, otherwise a single idle
+    # browser connection would stall every other client; the pool only
+    # saves starting one per connection
+    # One dual-stack socket serves IPv4 and IPv6 clients where the OS allows it
+    dual_stack = socket.has_dualstack_ipv6()
+    with PooledHTTPServer(("::" if dual_stack else "0.0.0.0", port), ServerAPIHandler,
+                          max_workers=http_threads, ssl_context=ssl_context,
+                          max_overflow=overflow_threads) as httpd:
+        scheme = 'https' if ssl_context is not None else 'http'
+        banner = [f"Server started on port {port}\n", f"Local access: {scheme}://localhost:{port}\n"]
+        banner.extend(f"Network access: {scheme}://{ip}:{port}\n" for ip in local_url_hosts(dual_stack))
+        sys.stdout.write(''.join(banner))
+        sys.stdout.flush()
         
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
             print("\nShutting down server...")
             httpd.server_close()
+        finally:
+            if ssl_context is not None:
+                logger.info(f"TLS session stats: {ssl_context.session_stats()}")
 
 def main():
     """Parse arguments and start server web interface"""
     parser = argparse.ArgumentParser(description='Lin-Win-Backup Server Web Interface')
     parser.add_argument('--port', type=int, default=3000, help='Port to run the server on (default: 3000)')
+    parser.add_argument('--threads-http', type=int, default=DEFAULT_HTTP_THREADS,
+                        help=f'Number of request worker threads kept ready for new connections (default: {DEFAULT_HTTP_THREADS})')
+    parser.add_argument('--threads-overflow', type=int, default=DEFAULT_OVERFLOW_THREADS,
+                        help='Most extra threads started while every worker is busy; further connections get a 503 '
+                             f'(default: {DEFAULT_OVERFLOW_THREADS})')
+    parser.add_argument('--certfile', help='PEM certificate chain, preferably with an ECDSA P-256 key; serves HTTPS when given')
+    parser.add_argument('--keyfile', help='PEM private key for --certfile (default: read from --certfile)')
     
     args = parser.parse_args()
+    if args.keyfile and not args.certfile:
+        parser.error('--keyfile requires --certfile')
     
-    # Configure logging
-    log_dir = os.path.expanduser("~/Lin-Win-Backup/logs")
-    os.makedirs(log_dir, exist_ok=True)
-    logger.add(os.path.join(log_dir, "server_web_interface.log"), rotation="1 day", retention="7 days")
+    # Configure logging; records are written to the file by loguru's background
+    # thread so request handlers never wait on the disk
+    os.makedirs(LOG_DIR, exist_ok=True)
+    logger.add(os.path.join(LOG_DIR, "server_web_interface.log"), rotation="1 day", retention="7 days",
+               compression="gz", enqueue=True)
     
     # Start server
-    run_server(port=args.port)
+    ssl_context = build_ssl_context(args.certfile, args.keyfile) if args.certfile else None
+    run_server(port=args.port, http_threads=args.threads_http, ssl_context=ssl_context,
+               overflow_threads=args.threads_overflow)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
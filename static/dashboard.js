@@ -0,0 +1,369 @@
+let currentClient = null;
+
+function formatBytes(bytes) {
+    if (bytes === 0) return '0 Bytes';
+    const k = 1024;
+    const sizes = ['Bytes', 'KB', 'MB', 'GB', 'TB'];
+    const i = Math.floor(Math.log(bytes) / Math.log(k));
+    return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
+}
+
+function formatDate(dateString) {
+    if (!dateString) return '-';
+    const date = new Date(dateString);
+    return date.toLocaleString();
+}
+
+// Clone a <template> and set the text of its [data-field] elements;
+// rows marked optional-row are dropped when their field is empty
+function fillTemplate(id, values, statusClass) {
+    const fragment = document.getElementById(id).content.cloneNode(true);
+    fragment.querySelectorAll('[data-field]').forEach(node => {
+        const value = values[node.dataset.field];
+        const row = node.closest('.optional-row');
+        if (row && !value) {
+            row.remove();
+        } else {
+            node.textContent = value ?? '';
+        }
+    });
+    if (statusClass) {
+        fragment.querySelector('[data-field="status"]').classList.add(statusClass);
+    }
+    return fragment;
+}
+
+function showNoData(element, message) {
+    const paragraph = document.createElement('p');
+    paragraph.className = 'no-data';
+    paragraph.textContent = message;
+    element.replaceChildren(paragraph);
+}
+
+function updateStatusBadge(element, status) {
+    element.textContent = status;
+    element.className = 'status-badge status-' + status.toLowerCase();
+}
+
+async function loadClients() {
+    try {
+        const response = await fetch('/api/clients');
+        const clients = await response.json();
+
+        const select = document.getElementById('client-select');
+        const selected = select.value;
+        select.innerHTML = '<option value="">Select a client...</option>';
+
+        clients.forEach(client => {
+            const option = document.createElement('option');
+            option.value = client.id;
+            option.textContent = client.hostname;
+            select.appendChild(option);
+        });
+        select.value = selected;
+    } catch (error) {
+        console.error('Error loading clients:', error);
+    }
+}
+
+async function loadClientData() {
+    const clientId = document.getElementById('client-select').value;
+    if (!clientId) {
+        document.getElementById('client-data').style.display = 'none';
+        return;
+    }
+
+    document.getElementById('client-data').style.display = 'block';
+
+    try {
+        const response = await fetch(`/api/client/${clientId}`);
+        const data = await response.json();
+
+        document.getElementById('hostname').textContent = data.hostname;
+        document.getElementById('system').textContent = data.system;
+        updateStatusBadge(document.getElementById('status'), data.status || 'Unknown');
+        document.getElementById('last-seen').textContent = formatDate(data.last_seen);
+
+        updateCurrentBackup(data.current_backup);
+        updateBackupSchedule(data.next_scheduled);
+        updateBackupHistory(data.backup_history);
+
+        currentClient = clientId;
+    } catch (error) {
+        console.error('Error loading client data:', error);
+    }
+}
+
+function updateCurrentBackup(currentBackup) {
+    const element = document.getElementById('current-backup');
+
+    if (!currentBackup) {
+        showNoData(element, 'No backup in progress');
+        return;
+    }
+
+    let statusClass = '';
+    if (currentBackup.status === 'in_progress') {
+        statusClass = 'in-progress';
+    } else if (currentBackup.status === 'completed') {
+        statusClass = 'completed';
+    } else if (currentBackup.status === 'failed') {
+        statusClass = 'failed';
+    }
+
+    element.replaceChildren(fillTemplate('current-backup-template', {
+        type: currentBackup.type || 'Unknown',
+        status: currentBackup.status || 'Unknown',
+        progress: `${currentBackup.progress || 0}%`,
+        start_time: formatDate(currentBackup.start_time),
+        error: currentBackup.error
+    }, statusClass));
+}
+
+function updateBackupSchedule(schedule) {
+    const element = document.getElementById('backup-schedule');
+
+    if (!schedule || !schedule.next_scheduled) {
+        showNoData(element, 'No scheduled backups');
+        return;
+    }
+
+    element.replaceChildren(fillTemplate('schedule-template', {
+        type: schedule.type || 'Unknown',
+        time: formatDate(schedule.next_scheduled),
+        source_dir: schedule.source_dir
+    }));
+}
+
+function updateBackupHistory(history) {
+    const element = document.getElementById('backup-history');
+
+    if (!history || history.length === 0) {
+        showNoData(element, 'No backup history available');
+        return;
+    }
+
+    const table = document.getElementById('history-table-template').content.cloneNode(true);
+    const rows = document.createDocumentFragment();
+
+    history.forEach(backup => {
+        let statusClass = '';
+        if (backup.status === 'completed') {
+            statusClass = 'completed';
+        } else if (backup.status === 'failed') {
+            statusClass = 'failed';
+        }
+
+        rows.appendChild(fillTemplate('history-row-template', {
+            type: backup.type || 'Unknown',
+            status: backup.status || 'Unknown',
+            start_time: formatDate(backup.start_time),
+            end_time: formatDate(backup.end_time),
+            size: formatBytes(backup.size || 0),
+            files: backup.files || 0
+        }, statusClass));
+    });
+
+    table.querySelector('tbody').replaceChildren(rows);
+    element.replaceChildren(table);
+}
+
+function showScheduleForm() {
+    document.getElementById('schedule-form').style.display = 'block';
+}
+
+function hideScheduleForm() {
+    document.getElementById('schedule-form').style.display = 'none';
+}
+
+async function handleScheduleSubmit(event) {
+    event.preventDefault();
+
+    const scheduleData = {
+        type: document.getElementById('schedule-type').value,
+        time: document.getElementById('schedule-time').value,
+        source: document.getElementById('schedule-source').value
+    };
+
+    try {
+        const response = await fetch(`/api/client/${currentClient}/schedule`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(scheduleData),
+        });
+
+        if (response.ok) {
+            hideScheduleForm();
+            loadClientData();
+        } else {
+            const data = await response.json();
+            alert(data.error || 'Failed to add schedule');
+        }
+    } catch (error) {
+        console.error('Error adding schedule:', error);
+        alert('An error occurred while adding the schedule');
+    }
+
+    return false;
+}
+
+async function handleLogout() {
+    try {
+        const response = await fetch('/logout', {
+            method: 'POST',
+        });
+
+        if (response.ok) {
+            window.location.href = '/';
+        }
+    } catch (error) {
+        console.error('Error logging out:', error);
+    }
+}
+
+function showAddClientForm() {
+    document.getElementById('add-client-form').style.display = 'block';
+}
+
+function hideAddClientForm() {
+    document.getElementById('add-client-form').style.display = 'none';
+    document.getElementById('client-ip').value = '';
+    document.getElementById('client-name').value = '';
+}
+
+async function handleAddClient(event) {
+    event.preventDefault();
+
+    const ip = document.getElementById('client-ip').value;
+    const friendlyName = document.getElementById('client-name').value;
+
+    try {
+        const response = await fetch('/api/add_client', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                ip: ip,
+                friendly_name: friendlyName
+            }),
+        });
+
+        const data = await response.json();
+
+        if (response.ok) {
+            hideAddClientForm();
+            loadClients(); // Refresh the client list
+            alert('Client added successfully!');
+        } else {
+            alert(data.error || 'Failed to add client');
+        }
+    } catch (error) {
+        console.error('Error adding client:', error);
+        alert('An error occurred while adding the client');
+    }
+
+    return false;
+}
+
+function showDirectoryInput() {
+    document.getElementById('directory-input').style.display = 'block';
+}
+
+function startBackup(type) {
+    const clientId = document.getElementById('client-select').value;
+    if (!clientId) {
+        showError('Please select a client first');
+        return;
+    }
+
+    fetch(`/api/client/${clientId}/backup/start`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ type: type })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.error) {
+            showError(data.error);
+        } else {
+            hideError();
+            loadClientData();
+        }
+    })
+    .catch(error => {
+        showError('Failed to start backup: ' + error);
+    });
+}
+
+function startDirectoryBackup() {
+    const clientId = document.getElementById('client-select').value;
+    const sourceDir = document.getElementById('source-dir').value;
+
+    if (!clientId) {
+        showError('Please select a client first');
+        return;
+    }
+
+    if (!sourceDir) {
+        showError('Please enter a directory path');
+        return;
+    }
+
+    fetch(`/api/client/${clientId}/backup/start`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            type: 'directory',
+            source_dir: sourceDir
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.error) {
+            showError(data.error);
+        } else {
+            hideError();
+            document.getElementById('directory-input').style.display = 'none';
+            document.getElementById('source-dir').value = '';
+            loadClientData();
+        }
+    })
+    .catch(error => {
+        showError('Failed to start backup: ' + error);
+    });
+}
+
+function showError(message) {
+    const errorElement = document.getElementById('error-message');
+    errorElement.textContent = message;
+    errorElement.style.display = 'block';
+}
+
+function hideError() {
+    document.getElementById('error-message').style.display = 'none';
+}
+
+// Refresh the display when the server reports a change to a client
+function watchClients() {
+    const events = new EventSource('/api/events');
+    events.onmessage = event => {
+        const change = JSON.parse(event.data);
+        if (change.index_changed) {
+            loadClients();
+        }
+        if (change.client_id === currentClient) {
+            loadClientData();
+        }
+    };
+}
+
+// Initial load
+loadClients();
+watchClients();
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import base64
+import hashlib
+import email.utils
+import signal
+import socket
+import shutil
+import tempfile
+import unittest
+import subprocess
+import time
+import requests
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER = os.path.join(ROOT, 'server_web_interface.py')
+
+def free_port():
+    """Return a TCP port that is currently unused"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+class ServerTestCase(unittest.TestCase):
+    """Runs the server in a subprocess with its own home directory"""
+    server_args = ()
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.home = tempfile.mkdtemp()
+        cls.port = free_port()
+        cls.start_server()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.stop_server()
+        shutil.rmtree(cls.home, ignore_errors=True)
+    
+    @classmethod
+    def start_server(cls):
+        """Start the server and wait until it accepts connections"""
+        cls.base_url = f'http://127.0.0.1:{cls.port}'
+        cls.server = subprocess.Popen(
+            [sys.executable, SERVER, '--port', str(cls.port), *cls.server_args],
+            env=dict(os.environ, HOME=cls.home), cwd=ROOT,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', cls.port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or cls.server.poll() is not None:
+                    cls.stop_server()
+                    shutil.rmtree(cls.home, ignore_errors=True)
+                    raise RuntimeError("Server did not start")
+                time.sleep(0.1)
+    
+    @classmethod
+    def stop_server(cls):
+        """Stop the server the way Ctrl-C does, so pending writes are flushed"""
+        cls.server.send_signal(signal.SIGINT)
+        cls.server.wait(timeout=10)
+    
+    def connect(self):
+        """Open a raw connection to the server"""
+        conn = socket.create_connection(('127.0.0.1', self.port), timeout=5)
+        self.addCleanup(conn.close)
+        return conn
+    
+    def read_response(self, conn):
+        """Read one response with a Content-Length body; return (status line, headers, body)"""
+        data = b''
+        while b'\r\n\r\n' not in data:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        head, _, body = data.partition(b'\r\n\r\n')
+        status, *lines = head.decode('latin-1').split('\r\n')
+        headers = {name.lower(): value.strip() for name, _, value in (line.partition(':') for line in lines)}
+        length = int(headers.get('content-length', 0))
+        while len(body) < length:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            body += chunk
+        return status, headers, body
+
+class ExpectContinueTest(ServerTestCase):
+    def test_100_continue_is_sent_before_the_body(self):
+        body = b'{"username": "nobody", "password": "wrong"}'
+        conn = self.connect()
+        conn.sendall(
+            b'POST /login HTTP/1.1\r\n'
+            b'Host: localhost\r\n'
+            b'Content-Type: application/json\r\n'
+            b'Expect: 100-continue\r\n'
+            b'Content-Length: %d\r\n'
+            b'\r\n' % len(body))
+        
+        conn.settimeout(1)
+        interim = conn.recv(65536)
+        self.assertTrue(interim.startswith(b'HTTP/1.1 100 Continue\r\n'), interim)
+        
+        conn.settimeout(5)
+        conn.sendall(body)
+        status, _, _ = self.read_response(conn)
+        self.assertEqual(status, 'HTTP/1.1 401 Unauthorized')
+
+class DateHeaderTest(ServerTestCase):
+    def test_prebuilt_responses_carry_a_date(self):
+        session = requests.Session()
+        responses = [
+            session.get(f'{self.base_url}/api/public_key'),
+            session.options(f'{self.base_url}/api/clients'),
+            session.post(f'{self.base_url}/login', json={'username': 'admin', 'password': 'wrong'}),
+            session.post(f'{self.base_url}/login', json={'username': 'admin', 'password': 'admin'}),
+            session.get(f'{self.base_url}/api/clients'),
+            session.post(f'{self.base_url}/logout'),
+        ]
+        for response in responses:
+            date = email.utils.parsedate_to_datetime(response.headers['Date'])
+            self.assertLess(abs(time.time() - date.timestamp()), 5, response.url)
+
+class EventStreamTest(ServerTestCase):
+    def test_stream_ends_when_its_session_is_logged_out(self):
+        session = requests.Session()
+        session.post(f'{self.base_url}/login', json={'username': 'admin', 'password': 'admin'})
+        client_id = session.post(f'{self.base_url}/api/add_client', json={'ip': '127.0.0.1'}).json()['client_id']
+        
+        conn = self.connect()
+        conn.sendall(b'GET /api/events HTTP/1.1\r\nHost: localhost\r\nCookie: auth_token=%b\r\n\r\n'
+                     % session.cookies['auth_token'].encode())
+        head = b''
+        while b'\r\n\r\n' not in head:
+            head += conn.recv(65536)
+        self.assertTrue(head.startswith(b'HTTP/1.1 200 OK\r\n'), head)
+        
+        # Changes made from a new session are no longer streamed to the old one
+        session.post(f'{self.base_url}/logout')
+        other = requests.Session()
+        other.post(f'{self.base_url}/login', json={'username': 'admin', 'password': 'admin'})
+        other.post(f'{self.base_url}/api/client/{client_id}/status', json={'system': 'Linux', 'hostname': 'host'})
+        conn.settimeout(2)
+        self.assertEqual(conn.recv(65536), b'')
+
+class RequestBodyTest(ServerTestCase):
+    def test_body_of_a_get_does_not_become_the_next_request(self):
+        conn = self.connect()
+        for method in (b'GET', b'OPTIONS'):
+            conn.sendall(method + b' /api/public_key HTTP/1.1\r\nHost: localhost\r\nContent-Length: 13\r\n\r\nDELETE / HTTP')
+            status, _, _ = self.read_response(conn)
+            self.assertEqual(status, 'HTTP/1.1 200 OK')
+        
+        conn.sendall(b'GET /api/public_key HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        status, _, body = self.read_response(conn)
+        self.assertEqual(status, 'HTTP/1.1 200 OK')
+        self.assertIn(b'public_key', body)
+    
+    def test_oversized_body_of_a_get_is_refused(self):
+        conn = self.connect()
+        conn.sendall(b'GET /api/public_key HTTP/1.1\r\nHost: localhost\r\nContent-Length: 100000000\r\n\r\n')
+        status, _, _ = self.read_response(conn)
+        self.assertEqual(status, 'HTTP/1.1 413 Request Entity Too Large')
+
+class OverflowLimitTest(ServerTestCase):
+    server_args = ('--threads-http', '1', '--threads-overflow', '1')
+    
+    def test_connections_past_the_limit_get_a_503(self):
+        # One connection takes the only worker and one the only overflow thread
+        busy = [self.connect(), self.connect()]
+        
+        conn = self.connect()
+        status, headers, _ = self.read_response(conn)
+        self.assertEqual(status, 'HTTP/1.1 503 Service Unavailable')
+        self.assertEqual(headers['connection'], 'close')
+        self.assertEqual(conn.recv(65536), b'')
+        
+        # The threads are free again once the server sees those connections close
+        for conn in busy:
+            conn.close()
+        deadline = time.monotonic() + 5
+        while True:
+            conn = self.connect()
+            conn.sendall(b'GET /api/public_key HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            status, _, _ = self.read_response(conn)
+            if status != 'HTTP/1.1 503 Service Unavailable' or time.monotonic() > deadline:
+                break
+            time.sleep(0.1)
+        self.assertEqual(status, 'HTTP/1.1 200 OK')
+
+def generate_public_key():
+    """Return a new RSA private key and its public key in PEM form"""
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_key = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo).decode()
+    return private_key, public_key
+
+class TempTokenTest(ServerTestCase):
+    def test_temp_token_is_hidden_and_used_up(self):
+        session = requests.Session()
+        session.post(f'{self.base_url}/login', json={'username': 'admin', 'password': 'admin'})
+        added = session.post(f'{self.base_url}/api/add_client', json={'ip': '127.0.0.1'}).json()
+        client_id, temp_token = added['client_id'], added['temp_token']
+        
+        record = session.get(f'{self.base_url}/api/client/{client_id}')
+        self.assertNotIn('temp_token', record.json())
+        self.assertNotIn(temp_token, record.text)
+        
+        _, public_key = generate_public_key()
+        registration = {'client_id': client_id, 'public_key': public_key, 'temp_token': temp_token,
+                        'hostname': 'host', 'system': 'Linux', 'version': '1'}
+        first = requests.post(f'{self.base_url}/api/register_client', json=registration)
+        self.assertEqual(first.status_code, 200)
+        second = requests.post(f'{self.base_url}/api/register_client', json=registration)
+        self.assertEqual(second.status_code, 401)
+
+class SessionKeyTest(ServerTestCase):
+    def test_session_key_survives_a_server_restart(self):
+        client_id = 'session-test'
+        private_key, public_key = generate_public_key()
+        response = requests.post(f'{self.base_url}/api/register_client', json={
+            'client_id': client_id, 'public_key': public_key,
+            'hostname': 'host', 'system': 'Linux', 'version': '1'})
+        self.assertEqual(response.status_code, 200)
+        key = private_key.decrypt(
+            base64.b64decode(response.json()['session_key']),
+            padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None))
+        
+        type(self).stop_server()
+        type(self).start_server()
+        
+        nonce = os.urandom(12)
+        sealed = AESGCM(key).encrypt(nonce, json.dumps({'system': 'Restarted'}).encode(), client_id.encode())
+        response = requests.post(f'{self.base_url}/api/client/{client_id}/status', json={
+            'encrypted_data': base64.b64encode(nonce + sealed).decode(), 'encryption': 'aes-gcm'})
+        self.assertEqual(response.status_code, 200, response.text)
+
+class LegacyPasswordTest(ServerTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # An admin whose password is still the SHA-256 digest of older versions
+        cls.home = tempfile.mkdtemp()
+        cls.port = free_port()
+        clients_dir = os.path.join(cls.home, 'Lin-Win-Backup', 'clients')
+        os.makedirs(clients_dir)
+        with open(os.path.join(clients_dir, 'users.json'), 'w') as f:
+            json.dump([{'username': 'legacy', 'password': hashlib.sha256(b'secret').hexdigest(), 'role': 'admin'}], f)
+        cls.start_server()
+    
+    def time_login(self, username):
+        """Fastest of several failed logins for a username, in seconds"""
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            response = requests.post(f'{self.base_url}/login', json={'username': username, 'password': 'wrong'})
+            timings.append(time.perf_counter() - start)
+            self.assertEqual(response.status_code, 401)
+        return min(timings)
+    
+    def test_wrong_legacy_password_costs_a_full_verify(self):
+        unknown = self.time_login('nobody')
+        legacy = self.time_login('legacy')
+        self.assertGreater(legacy, unknown / 2)
+
+class StaticAssetTest(unittest.TestCase):
+    def test_import_does_not_read_the_static_files(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        for name in ('server_web_interface.py', 'encryption_utils.py'):
+            shutil.copy(os.path.join(ROOT, name), directory)
+        result = subprocess.run(
+            [sys.executable, '-c', 'import server_web_interface'],
+            env=dict(os.environ, HOME=directory), cwd=directory, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+if __name__ == '__main__':
+    unittest.main()